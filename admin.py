@@ -0,0 +1,58 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from db_init import app
+from debate_sessions import debate_sessions
+from bulk_evaluation import bulk_jobs, select_debates, resolve_user_ids, run_options, parse_date
+
+admin_bp = Blueprint('admin', __name__)
+
+def is_admin():
+    return current_user.is_authenticated and (current_user.email or '').lower() in app.config['ADMIN_EMAILS']
+
+@admin_bp.route('/evaluations', methods=['POST'])
+@login_required
+def start_evaluations():
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        since = parse_date(data.get('since'))
+        until = parse_date(data.get('until'))
+        limit, workers, batch_size, rate_limit = (
+            int(data[name]) if data.get(name) is not None else None
+            for name in ('limit', 'workers', 'batch_size', 'rate_limit')
+        )
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid filters: dates must be ISO 8601 and counts integers'}), 400
+    
+    # Select by user, date range and topic; debates with a current evaluation are left out
+    debate_sessions.flush_all()
+    user_ids = resolve_user_ids(data['users']) if data.get('users') else None
+    debate_ids = select_debates(user_ids, since, until, data.get('topic'), limit)
+    
+    job = bulk_jobs.start(debate_ids, **run_options(workers=workers, batch_size=batch_size, rate_limit=rate_limit))
+    if job is None:
+        return jsonify({'error': 'A bulk evaluation is already running'}), 409
+    return jsonify(job.stats()), 202
+
+@admin_bp.route('/evaluations/<job_id>', methods=['GET'])
+@login_required
+def evaluation_status(job_id):
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.stats())
+
+@admin_bp.route('/evaluations/<job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_evaluations(job_id):
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    job.cancel()
+    return jsonify(job.stats())
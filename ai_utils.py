@@ -1,37 +1,102 @@
-import google.generativeai as genai
-from db_init import app
+from db_init import app, db
 import os
+import re
 import json
-from datetime import datetime
-import time
-import pyttsx3
-import threading
-
-# Configure Gemini with API key directly from environment
-import dotenv
-# Reload environment variables to ensure we get the latest values
-dotenv.load_dotenv(override=True)
-api_key = os.environ.get('GEMINI_API_KEY')
-
-# Initialize Gemini with API key
-if api_key:
-    genai.configure(api_key=api_key)
-    print(f"Gemini API initialized with API key starting with: {api_key[:15]}...")
-else:
-    print("WARNING: No Gemini API key found in environment variables!")
-
-# Initialize pyttsx3
-engine = pyttsx3.init()
-# Set properties
-engine.setProperty('rate', 180)  # Speed of speech
-engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
-
-def generate_debate_response(topic, position, history):
-    prompt = f"""
+import uuid
+import wave
+import atexit
+from tts_cache import TTSCache
+import audio_encoder
+from ttl_cache import TTLCache
+from llm_runtime import LLMRuntime, CircuitBreaker
+from llm_router import LLMRouter, GeminiBackend, OpenAIBackend, LocalBackend
+from prompt_builder import estimate_tokens, truncate_to_tokens, pack_turns
+from tts_pool import TTSPool, TTSPoolBusy
+from rate_limit import ConcurrencyLimit, CapacityExceeded, client_key
+from metrics import registry, span, record_cache, LLM_TOKENS, FAILURES
+from providers import providers
+from models import DebateTurn, CRITERIA
+import logging
+
+logger = logging.getLogger(__name__)
+
+def init_gemini():
+    """Import and configure the Gemini SDK; runs on the first LLM call"""
+    import dotenv
+    import google.generativeai as genai
+    # Reload environment variables to ensure we get the latest values
+    dotenv.load_dotenv(override=True)
+    api_key = os.environ.get('GEMINI_API_KEY')
+    
+    # Initialize Gemini with API key
+    if api_key:
+        genai.configure(api_key=api_key)
+        logger.info("Gemini API initialized with API key starting with: %s...", api_key[:15])
+    else:
+        logger.warning("No Gemini API key found in environment variables!")
+    return genai
+
+def init_openai():
+    """Create the OpenAI client; runs on the first call routed to OpenAI"""
+    from openai import OpenAI
+    return OpenAI(api_key=app.config['OPENAI_API_KEY'])
+
+def init_tts():
+    """Spawn the TTS worker processes; runs on the first synthesis"""
+    tts_pool.start()
+    return tts_pool
+
+# Backends are created on first use so importing the app stays fast and
+# works on hosts without the Gemini SDK or a speech engine
+providers.register('gemini', init_gemini)
+providers.register('openai', init_openai)
+providers.register('tts', init_tts)
+
+# pyttsx3 engines live in worker processes, one per worker
+tts_pool = TTSPool(
+    size=app.config['TTS_POOL_SIZE'],
+    max_pending=app.config['TTS_POOL_MAX_PENDING'],
+    rate=app.config['TTS_RATE'],  # Speed of speech
+    volume=app.config['TTS_VOLUME'],  # Volume (0.0 to 1.0)
+    voice=app.config['TTS_VOICE']
+)
+atexit.register(tts_pool.shutdown)
+registry.gauge('tts_pool_active', 'TTS worker processes currently synthesizing.', lambda: tts_pool.active)
+registry.gauge('tts_pool_waiting', 'TTS jobs waiting for a free worker process.', lambda: tts_pool.waiting)
+
+def forget_evicted_audio(paths):
+    """Mark turns whose audio was evicted from the cache as having none"""
+    with app.app_context():
+        DebateTurn.query.filter(DebateTurn.audio.in_(paths)).update(
+            {'audio': None, 'audio_status': 'evicted'}, synchronize_session=False
+        )
+        db.session.commit()
+
+# Synthesized audio is shared between identical phrases
+tts_cache = TTSCache(
+    directory='static/audio',
+    max_bytes=app.config['TTS_CACHE_MAX_BYTES'],
+    sweep_bytes=app.config['TTS_CACHE_SWEEP_BYTES'],
+    sweep_interval=app.config['TTS_CACHE_SWEEP_INTERVAL'],
+    on_evict=forget_evicted_audio
+)
+
+def build_debate_prompt(topic, position, history, summary=None):
+    """Pack a rolling summary and the most recent turns into PROMPT_TOKEN_BUDGET tokens"""
+    budget = app.config['PROMPT_TOKEN_BUDGET']
+    summary_text = ''
+    if summary:
+        summary_text = truncate_to_tokens(summary, app.config['SUMMARY_TOKEN_LIMIT'])
+        budget -= estimate_tokens(summary_text)
+    recent = pack_turns(history, max(budget, 0), app.config['TURN_TOKEN_LIMIT'])
+    
+    return f"""
     [ROLE] You are a world-class debater arguing the {position} position.
     [TOPIC] Debate topic: "{topic}"
+    [SUMMARY] Earlier in the debate:
+    {summary_text or 'Nothing yet.'}
     [HISTORY] Previous arguments:
-    {format_history(history[-4:])}
+    {format_history(recent)}
     
     [TASK] Craft a compelling response that:
     1. Directly addresses the last point made
@@ -41,42 +106,178 @@ def generate_debate_response(topic, position, history):
     5. Is 2-3 sentences maximum
       [RESPONSE]
     """
+
+def format_arguments(arguments):
+    return "\n".join(
+        f"{number}. {text}" for number, text in enumerate(arguments, start=1)
+    )
+
+# Generation settings for each kind of call
+DEBATE_SETTINGS = {
+    'temperature': 0.8,
+    'max_output_tokens': 200,
+    'top_p': 0.95,
+    'top_k': 40
+}
+EVALUATION_SETTINGS = {
+    'temperature': 0.3,
+    'max_output_tokens': 600,
+    'top_p': 0.95,
+    'top_k': 40
+}
+SCORING_SETTINGS = {
+    'temperature': 0.2,
+    'max_output_tokens': 120,
+    'top_p': 0.95,
+    'top_k': 40
+}
+SUMMARY_SETTINGS = {
+    'temperature': 0.2,
+    'max_output_tokens': 200,
+    'top_p': 0.95,
+    'top_k': 40
+}
+
+def build_runtime():
+    """Blocking client calls run off the gevent hub with deadlines, retries and a circuit breaker"""
+    return LLMRuntime(
+        timeout=app.config['LLM_TIMEOUT'],
+        retries=app.config['LLM_RETRIES'],
+        backoff=app.config['LLM_RETRY_BACKOFF'],
+        pool_size=app.config['LLM_THREADPOOL_SIZE'],
+        breaker=CircuitBreaker(
+            failure_threshold=app.config['LLM_BREAKER_THRESHOLD'],
+            reset_timeout=app.config['LLM_BREAKER_RESET']
+        )
+    )
+
+def build_backend(name):
+    window = app.config['LLM_STATS_WINDOW']
+    timeout = app.config['LLM_TIMEOUT']
+    if name == 'gemini':
+        return GeminiBackend(build_runtime(), lambda: providers.get('gemini'), app.config['DEBATE_MODEL'],
+                             timeout, window)
+    if name == 'openai':
+        return OpenAIBackend(build_runtime(), lambda: providers.get('openai'), app.config['OPENAI_MODEL'],
+                             timeout, window)
+    if name == 'local':
+        return LocalBackend(build_runtime(), window)
+    raise ValueError(f"Unknown LLM provider '{name}'")
+
+# Calls go to the fastest healthy provider in LLM_PROVIDERS, failing over to the others
+llm_router = LLMRouter(
+    [build_backend(name) for name in app.config['LLM_PROVIDERS']],
+    max_error_rate=app.config['LLM_MAX_ERROR_RATE'],
+    hedge_delay=app.config['LLM_HEDGE_DELAY'],
+    min_hedge_delay=app.config['LLM_HEDGE_MIN_DELAY'],
+    hedge_workers=app.config['LLM_THREADPOOL_SIZE']
+)
+
+registry.gauge('llm_in_flight', 'LLM calls currently in flight.',
+               lambda: sum(backend.runtime.in_flight for backend in llm_router.backends))
+registry.gauge('llm_circuit_open', 'Whether every LLM provider circuit breaker is open.',
+               lambda: int(all(backend.runtime.breaker.state == 'open' for backend in llm_router.backends)))
+
+# Process-wide caps on concurrent LLM calls and TTS syntheses
+llm_slots = ConcurrencyLimit('llm', app.config['LLM_MAX_CONCURRENCY'])
+tts_slots = ConcurrencyLimit('tts', app.config['TTS_MAX_CONCURRENCY'])
+registry.gauge('llm_slots_waiting', 'LLM calls waiting for a concurrency slot.', lambda: len(llm_slots.waiters))
+registry.gauge('tts_slots_waiting', 'TTS jobs waiting for a concurrency slot.', lambda: len(tts_slots.waiters))
+
+# Replies to prompts that recur verbatim, such as opening statements
+response_cache = TTLCache(
+    max_size=app.config['AI_RESPONSE_CACHE_SIZE'],
+    ttl=app.config['AI_RESPONSE_CACHE_TTL']
+)
+
+def request_llm(kind, prompt, settings, hedge=False):
+    """Send a prompt to the routed LLM provider, returning the reply text"""
+    return route_llm(kind, prompt, settings, hedge=hedge)[1]
+
+def route_llm(kind, prompt, settings, hedge=False):
+    """Like request_llm, but return (provider name, reply text)"""
+    timeout = app.config['LLM_TIMEOUT']
+    LLM_TOKENS.inc(estimate_tokens(prompt), kind='prompt')
+    with llm_slots.slot(client_key(), timeout=timeout), span('llm_call'):
+        provider, text = llm_router.generate(kind, prompt, settings, hedge=hedge)
+    logger.debug("Received %s reply from %s", kind, provider)
+    text = (text or '').strip()
+    LLM_TOKENS.inc(estimate_tokens(text), kind='completion')
+    return provider, text
+
+def debate_error_message(error_message, model_name):
+    logger.error("Error generating debate response: %s", error_message)
+    FAILURES.inc(component='llm')
+    
+    # Provide more detailed error message based on the exception
+    if "not found" in error_message.lower():
+        logger.error("Model '%s' not found or not available with your API key", model_name)
+        return "I'm having trouble accessing the AI model. Please check that your API key has access to the specified model."
+    else:
+        return "I'm having trouble forming a response. Let's continue the debate when I'm feeling more articulate."
+
+def generate_debate_response(topic, position, history, summary=None):
+    with span('prompt_build'):
+        prompt = build_debate_prompt(topic, position, history, summary)
+    
+    # Get the model name from app config
+    model_name = app.config['DEBATE_MODEL']
+    
+    # Opening statements depend only on the topic and side, so they can be reused
+    cache_key = None
+    if not history and app.config['AI_RESPONSE_CACHE_ENABLED']:
+        cache_key = ('opening', model_name, topic.strip().lower(), position)
+        cached = response_cache.get(cache_key)
+        record_cache('ai_response', bool(cached))
+        if cached:
+            return cached
     
     try:
-        # Get the model name from app config
-        model_name = app.config['DEBATE_MODEL']
-        print(f"Using debate model: {model_name}")
-        
-        # Create and configure the model
-        model = genai.GenerativeModel(model_name)
-        
-        # Generate response
-        generation_config = genai.types.GenerationConfig(
-            temperature=0.8,
-            max_output_tokens=200,
-            top_p=0.95,
-            top_k=40
-        )
-        
-        print(f"Sending prompt to Gemini model '{model_name}'...")
-        response = model.generate_content(prompt, generation_config=generation_config)
-        
-        argument = response.text.strip()
-        print(f"Successfully received response from Gemini")
+        # A second provider is started if the first runs past its p95 latency
+        argument = request_llm('debate', prompt, DEBATE_SETTINGS, hedge=app.config['LLM_HEDGE_ENABLED'])
+        if cache_key:
+            response_cache.set(cache_key, argument)
         return argument
     except Exception as e:
-        error_message = str(e)
-        print(f"Error generating debate response: {error_message}")
-        
-        # Provide more detailed error message based on the exception
-        if "not found" in error_message.lower():
-            print(f"Model '{model_name}' not found or not available with your API key")
-            return "I'm having trouble accessing the AI model. Please check that your API key has access to the specified model."
+        return debate_error_message(str(e), model_name)
+
+def stream_debate_response(topic, position, history, summary=None):
+    """Yield the AI rebuttal in chunks as the LLM produces them.
+    
+    If the stream fails before any text arrives, the usual fallback
+    message is yielded instead so callers always get a complete reply.
+    """
+    with span('prompt_build'):
+        prompt = build_debate_prompt(topic, position, history, summary)
+    
+    model_name = app.config['DEBATE_MODEL']
+    received_text = False
+    try:
+        LLM_TOKENS.inc(estimate_tokens(prompt), kind='prompt')
+        with llm_slots.slot(client_key(), timeout=app.config['LLM_TIMEOUT']), span('llm_stream'):
+            for text in llm_router.stream('debate', prompt, DEBATE_SETTINGS):
+                received_text = True
+                LLM_TOKENS.inc(estimate_tokens(text), kind='completion')
+                yield text
+        logger.debug("Finished streaming debate response")
+    except Exception as e:
+        if received_text:
+            # Keep the partial rebuttal rather than replacing it mid-sentence
+            logger.warning("LLM stream interrupted: %s", e)
+            FAILURES.inc(component='llm')
         else:
-            return "I'm having trouble forming a response. Let's continue the debate when I'm feeling more articulate."
+            yield debate_error_message(str(e), model_name)
 
-def evaluate_performance(transcript):
-    user_args = [msg['text'] for msg in transcript if msg['speaker'] == 'user']
+def evaluation_prompt(transcript, summary=None):
+    user_turns = [msg for msg in transcript if msg['speaker'] == 'user']
+    
+    # Keep the prompt within budget, preferring the most recent arguments
+    budget = app.config['EVALUATION_TOKEN_BUDGET']
+    summary_text = ''
+    if summary:
+        summary_text = truncate_to_tokens(summary, app.config['SUMMARY_TOKEN_LIMIT'])
+        budget -= estimate_tokens(summary_text)
+    user_args = [msg['text'] for msg in pack_turns(user_turns, max(budget, 0), app.config['TURN_TOKEN_LIMIT'])]
     
     prompt = f"""
     [ROLE] You are a professional debate judge analyzing a debate performance.
@@ -94,12 +295,15 @@ def evaluate_performance(transcript):
     4. Analysis of 2 key arguments with suggestions
     5. Overall remarks
     
+    [DEBATE SUMMARY]
+    {summary_text or 'Not available.'}
+    
     [DEBATE TRANSCRIPT]
-    {json.dumps(user_args, indent=2)}
+    {format_arguments(user_args)}
     
     [RESPONSE FORMAT]
     Score: [number]/100
-    Breakdown: [JSON]
+    Breakdown: {{"logical_consistency": [0-100], "evidence_quality": [0-100], "rebuttal_effectiveness": [0-100], "persuasiveness": [0-100], "rhetorical_skill": [0-100]}}
     Strengths:
     - [strength1]
     - [strength2]
@@ -120,66 +324,275 @@ def evaluate_performance(transcript):
     
     Final Remarks: [overall feedback]
     """
-    
+    return prompt
+
+def evaluate_performance(transcript, summary=None):
+    prompt = evaluation_prompt(transcript, summary)
     try:
         # Get the model name from app config
         model_name = app.config['DEBATE_MODEL']
-        print(f"Using evaluation model: {model_name}")
-        
-        # Create and configure the model
-        model = genai.GenerativeModel(model_name)
-        
-        # Generate response
-        generation_config = genai.types.GenerationConfig(
-            temperature=0.3,
-            max_output_tokens=600,
-            top_p=0.95,
-            top_k=40
-        )
-        
-        print(f"Sending evaluation prompt to Gemini model '{model_name}'...")
-        response = model.generate_content(prompt, generation_config=generation_config)
-        
-        print(f"Successfully received evaluation from Gemini")
-        return response.text.strip()
+        return request_llm('evaluation', prompt, EVALUATION_SETTINGS)
     except Exception as e:
         error_message = str(e)
-        print(f"Error generating evaluation: {error_message}")
+        logger.error("Error generating evaluation: %s", error_message)
+        FAILURES.inc(component='llm')
         
         # Provide more detailed error message based on the exception
         if "not found" in error_message.lower():
-            print(f"Model '{model_name}' not found or not available with your API key")
+            logger.error("Model '%s' not found or not available with your API key", model_name)
             return "I'm having trouble accessing the AI model for evaluation. Please check that your API key has access to the specified model."
         else:
             return "I'm unable to evaluate the debate at this time. Please try again later."
 
-def generate_tts(text):
-    """Generate and save TTS audio with natural pauses"""
+def score_argument(topic, position, argument, opponent_text=None):
+    """Score a single user argument, returning its score, criterion scores and notes, or None on failure"""
+    prompt = f"""
+    [ROLE] You are a professional debate judge scoring one argument.
+    [TOPIC] Debate topic: "{topic}" (the speaker argues {position})
+    [OPPONENT] {opponent_text or 'No previous argument.'}
+    [ARGUMENT] {argument}
+    
+    [CRITERIA] Logical consistency, evidence quality, rebuttal effectiveness,
+    persuasiveness and rhetorical skill.
+    
+    [RESPONSE FORMAT]
+    Score: [number]/100
+    Breakdown: {{"logical_consistency": [0-100], "evidence_quality": [0-100], "rebuttal_effectiveness": [0-100], "persuasiveness": [0-100], "rhetorical_skill": [0-100]}}
+    Strength: [a few words]
+    Improvement: [a few words]
+    Feedback: [one sentence]
+    """
+    
+    try:
+        text = request_llm('scoring', prompt, SCORING_SETTINGS)
+    except Exception as e:
+        logger.error("Error scoring argument: %s", e)
+        FAILURES.inc(component='llm')
+        return None
+    
+    score = parse_score(text)
+    if score is None:
+        return None
+    return {
+        'score': score,
+        'criteria': parse_breakdown(text),
+        'strength': parse_field(text, 'Strength'),
+        'improvement': parse_field(text, 'Improvement'),
+        'feedback': parse_field(text, 'Feedback')
+    }
+
+def summarize_turns(topic, previous_summary, turns):
+    """Fold `turns` into the running debate summary, returning None on failure"""
+    prompt = f"""
+    [ROLE] You keep concise notes on a debate about "{topic}".
+    [CURRENT NOTES]
+    {previous_summary or 'None yet.'}
+    [NEW ARGUMENTS]
+    {format_history(turns)}
+    
+    [TASK] Rewrite the notes to include the new arguments. Keep each side's
+    key claims and evidence, drop repetition, and stay under 120 words.
+    """
+    
+    try:
+        return request_llm('summary', prompt, SUMMARY_SETTINGS)
+    except Exception as e:
+        logger.error("Error summarizing debate: %s", e)
+        FAILURES.inc(component='llm')
+        return None
+
+def parse_score(evaluation):
+    """Extract the numeric total from a "Score: N/100" line, if present"""
+    match = re.search(r'Score:\s*(\d{1,3})\s*/\s*100', evaluation or '')
+    if not match:
+        return None
+    return min(int(match.group(1)), 100)
+
+# A word that identifies each criterion in the judge's breakdown keys;
+# the stored name itself unless the judge tends to inflect it
+KEYWORD_STEMS = {'persuasiveness': 'persuas', 'rhetoric': 'rhetor'}
+CRITERION_KEYWORDS = {name: KEYWORD_STEMS.get(name, name) for name in CRITERIA}
+
+def parse_criterion_score(value):
+    """Read a breakdown value such as 82, "82", "24/30" or "82%" as a 0-100 score"""
+    match = re.match(r'\s*(\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?))?', str(value))
+    if not match:
+        return None
+    score = float(match.group(1))
+    if match.group(2) and float(match.group(2)) > 0:
+        score = score * 100 / float(match.group(2))
+    return max(0, min(round(score), 100))
+
+def parse_list_section(evaluation, heading):
+    """Bullet items under `heading:` up to the next blank line or heading"""
+    match = re.search(rf'^\s*{heading}:\s*\n(.*?)(?:\n\s*\n|\n\s*[A-Z][A-Za-z ]+:|\Z)', evaluation, re.M | re.S)
+    if not match:
+        return []
+    items = []
+    for line in match.group(1).splitlines():
+        item = re.sub(r'^\s*(?:[-*\u2022]|\d+[.)])\s*', '', line).strip()
+        if item:
+            items.append(item)
+    return items
+
+def parse_field(text, label):
+    """The rest of the line after `label:`, if present"""
+    match = re.search(rf'^\s*{label}:[ \t]*(\S.*)', text or '', re.M)
+    return match.group(1).strip() if match else None
+
+def parse_breakdown(evaluation):
+    """Criterion scores from the judge's "Breakdown: {...}" line, None where one is missing"""
+    criteria = dict.fromkeys(CRITERIA)
+    match = re.search(r'Breakdown:\s*(\{.*?\})', evaluation or '', re.S)
+    if match:
+        try:
+            breakdown = json.loads(match.group(1))
+        except ValueError:
+            # Unquoted keys or trailing commas; fall back to "name: value" pairs
+            breakdown = dict(re.findall(r'["\']?([A-Za-z_ ]+)["\']?\s*:\s*["\']?([\d./%]+)', match.group(1)))
+        if isinstance(breakdown, dict):
+            for key, value in breakdown.items():
+                for name, keyword in CRITERION_KEYWORDS.items():
+                    if keyword in str(key).lower() and criteria[name] is None:
+                        criteria[name] = parse_criterion_score(value)
+    return criteria
+
+def parse_evaluation(evaluation):
+    """Pull the total, criterion scores, strengths and improvements out of an evaluation"""
+    evaluation = evaluation or ''
+    return {
+        'score': parse_score(evaluation),
+        'criteria': parse_breakdown(evaluation),
+        'strengths': parse_list_section(evaluation, 'Strengths'),
+        'improvements': parse_list_section(evaluation, 'Improvements')
+    }
+
+def generate_tts(text, timeout=10, encode=True):
+    """Generate and save TTS audio with natural pauses.
+    
+    Audio is cached by text and voice settings, so a phrase that has been
+    synthesized before is returned without touching the engine. Unless
+    `encode` is False, the WAV is then compressed to TTS_AUDIO_FORMAT.
+    """
     if not os.path.exists('static/audio'):
         os.makedirs('static/audio')
     
     # Add natural pauses by inserting commas and periods
     text_with_pauses = text
     
-    filename = f"static/audio/tts_{datetime.now().strftime('%Y%m%d%H%M%S')}.wav"
+    encoded_filename = encoded_tts_path(text_with_pauses) if encode else None
+    if encoded_filename and tts_cache.lookup(encoded_filename):
+        record_cache('tts', True)
+        return encoded_filename
     
-    # Generate speech with pyttsx3
-    try:
-        # We'll use a thread to prevent blocking since pyttsx3 can block
-        def save_speech():
-            engine.save_to_file(text_with_pauses, filename)
-            engine.runAndWait()
-            
-        thread = threading.Thread(target=save_speech)
-        thread.start()
-        thread.join(timeout=10)  # Wait up to 10 seconds
-            
-    except Exception as e:
-        print(f"TTS Error: {str(e)}")
-        # Create an empty file as fallback
-        with open(filename, 'wb') as f:
-            f.write(b'')
+    key = tts_key(text_with_pauses)
+    filename = tts_cache.path_for(key)
+    cached = tts_cache.lookup(filename)
+    record_cache('tts', cached)
+    if not cached:
+        # Synthesize to a private file first so concurrent calls never see a partial file
+        temp_filename = f"static/audio/.tmp_{key}_{uuid.uuid4().hex}.wav"
         
+        # Generate speech in the TTS worker pool; hung workers are restarted after the timeout
+        try:
+            with tts_slots.slot(timeout=timeout):
+                synthesized = providers.get('tts').synthesize(text_with_pauses, temp_filename, filename, timeout=timeout)
+            if synthesized:
+                tts_cache.record_write(filename)
+        except (TTSPoolBusy, CapacityExceeded) as e:
+            logger.error("TTS Error: %s", e)
+            FAILURES.inc(component='tts')
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+    
+    if encoded_filename and tts_ready(filename):
+        return encode_tts(filename, encoded_filename)
+    return filename
+
+def encoded_tts_path(text):
+    """Cache path of the compressed audio for `text`, or None when serving WAV"""
+    audio_format = app.config['TTS_AUDIO_FORMAT']
+    if audio_format not in audio_encoder.FORMATS or not audio_encoder.ffmpeg_path():
+        return None
+    key = tts_cache.key(
+        text,
+        app.config['TTS_RATE'],
+        app.config['TTS_VOLUME'],
+        app.config['TTS_VOICE'],
+        variant=f"{audio_format}:{app.config['TTS_AUDIO_BITRATE']}"
+    )
+    return tts_cache.path_for(key, audio_encoder.extension_for(audio_format))
+
+def encode_tts(wav_filename, encoded_filename, keep_wav=None):
+    """Compress a synthesized WAV, falling back to the WAV if encoding fails"""
+    if keep_wav is None:
+        keep_wav = app.config['TTS_KEEP_WAV']
+    
+    temp_filename = f"static/audio/.tmp_{uuid.uuid4().hex}.{audio_encoder.extension_for(app.config['TTS_AUDIO_FORMAT'])}"
+    try:
+        if not audio_encoder.encode(wav_filename, temp_filename,
+                                    app.config['TTS_AUDIO_FORMAT'], app.config['TTS_AUDIO_BITRATE']):
+            return wav_filename
+        os.replace(temp_filename, encoded_filename)
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+    
+    if not keep_wav and os.path.exists(wav_filename):
+        os.remove(wav_filename)
+    tts_cache.record_write(encoded_filename)
+    return encoded_filename
+
+def cached_tts(text):
+    """Return the delivered audio file for `text` if it is already cached"""
+    filename = encoded_tts_path(text) or tts_cache.path_for(tts_key(text))
+    return filename if tts_cache.lookup(filename) else None
+
+def audio_url(filename):
+    """URL of the audio endpoint that serves `filename`"""
+    return f"/audio/{os.path.basename(filename)}" if filename else None
+
+def tts_key(text):
+    return tts_cache.key(
+        text,
+        app.config['TTS_RATE'],
+        app.config['TTS_VOLUME'],
+        app.config['TTS_VOICE']
+    )
+
+def tts_ready(filename):
+    return bool(filename) and os.path.exists(filename) and os.path.getsize(filename) > 0
+
+def split_sentences(text):
+    """Split text after sentence-ending punctuation for pipelined synthesis"""
+    return [sentence.strip() for sentence in re.split(r'(?<=[.!?])\s+', text or '') if sentence.strip()]
+
+def combine_tts(text, segment_files):
+    """Join per-sentence WAV files into the cached audio file for the full text"""
+    key = tts_key(text)
+    filename = tts_cache.path_for(key)
+    if tts_cache.lookup(filename):
+        return filename
+    
+    temp_filename = f"static/audio/.tmp_{key}_{uuid.uuid4().hex}.wav"
+    try:
+        with wave.open(temp_filename, 'wb') as output:
+            for index, segment_file in enumerate(segment_files):
+                with wave.open(segment_file, 'rb') as segment:
+                    if index == 0:
+                        output.setparams(segment.getparams())
+                    output.writeframes(segment.readframes(segment.getnframes()))
+        os.replace(temp_filename, filename)
+    except (wave.Error, EOFError, OSError) as e:
+        logger.error("TTS Error: could not combine segments: %s", e)
+        FAILURES.inc(component='tts')
+        return None
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+    
+    tts_cache.record_write(filename)
     return filename
 
 def format_history(history):
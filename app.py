@@ -5,20 +5,37 @@ from models import User
 
 # Set up login user loader
 from extensions import login
-from models import load_user
+from user_cache import load_cached_user
 
 @login.user_loader
 def user_loader(id):
-    return User.query.get(int(id))
+    return load_cached_user(id)
 
 # Register blueprints
 from auth import auth_bp
 from debate import debate_bp
+from admin import admin_bp
 app.register_blueprint(auth_bp, url_prefix='/auth')
 app.register_blueprint(debate_bp, url_prefix='/debate')
+app.register_blueprint(admin_bp, url_prefix='/admin')
+
+# Request timing and slow request logging
+import metrics
+metrics.init_app(app)
 
 # Import routes
 from routes import *
 
+# SocketIO room handlers
+import sockets
+
+# Register CLI commands
+import commands
+
+# Optionally initialize the LLM client and TTS workers ahead of the first request
+from providers import providers
+if app.config['WARMUP_PROVIDERS']:
+    providers.warm_up_in_background(app.config['WARMUP_PROVIDERS'])
+
 if __name__ == '__main__':
     socketio.run(app, debug=True)
\ No newline at end of file
@@ -0,0 +1,45 @@
+import functools
+import logging
+import shutil
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Output format -> (ffmpeg codec, file extension)
+FORMATS = {
+    'mp3': ('libmp3lame', 'mp3'),
+    'ogg': ('libopus', 'ogg'),
+}
+
+@functools.lru_cache(maxsize=1)
+def ffmpeg_path():
+    return shutil.which('ffmpeg')
+
+def extension_for(audio_format):
+    return FORMATS[audio_format][1] if audio_format in FORMATS else 'wav'
+
+def encode(source, target, audio_format, bitrate, timeout=30):
+    """Encode a WAV file with ffmpeg, returning True on success"""
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg or audio_format not in FORMATS:
+        return False
+
+    codec = FORMATS[audio_format][0]
+    command = [
+        ffmpeg, '-y', '-loglevel', 'error',
+        '-i', source,
+        '-c:a', codec,
+        '-b:a', bitrate,
+        '-f', audio_format,
+        target
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error("Audio encoding error: %s", e)
+        return False
+
+    if result.returncode != 0:
+        logger.error("Audio encoding error: %s", result.stderr.decode(errors='replace').strip())
+        return False
+    return True
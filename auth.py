@@ -1,12 +1,15 @@
 from flask import Blueprint, redirect, url_for, request, flash, session, render_template, jsonify
 from flask_login import login_user, logout_user, current_user
 from models import User
-from db_init import db
+from db_init import app, db
 from extensions import oauth
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_pool import PasswordHasher
 
 auth_bp = Blueprint('auth', __name__)
 
+# Hashing is slow by design, so it runs off the request greenlets
+password_hasher = PasswordHasher(workers=app.config['PASSWORD_HASH_WORKERS'])
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -24,7 +27,7 @@ def register():
     user = User(
         username=data['username'],
         email=data['email'],
-        password_hash=generate_password_hash(data['password'])
+        password_hash=password_hasher.hash(data['password'])
     )
     
     db.session.add(user)
@@ -47,7 +50,7 @@ def login():
     user = User.query.filter_by(email=data['email']).first()
     
     # Check password
-    if not user or not check_password_hash(user.password_hash, data['password']):
+    if not user or not password_hasher.verify(user.password_hash, data['password']):
         return jsonify({'success': False, 'message': 'Invalid email or password'}), 401
     
     # Log the user in
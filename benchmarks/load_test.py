@@ -0,0 +1,212 @@
+"""Offline load test for the debate flow.
+
+Simulates N concurrent users who register, log in, start a debate, join
+its SocketIO room, submit several arguments and request an evaluation.
+Gemini and pyttsx3 are replaced by the stubs in benchmarks.stubs, so runs
+need no network or audio hardware and are repeatable.
+
+    python -m benchmarks.load_test --users 20 --turns 5 --llm-latency 0.4
+
+Results are written as JSON to benchmarks/results/ and can be compared
+against an earlier run with --compare.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks import stubs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=10, help='Concurrent simulated users')
+    parser.add_argument('--turns', type=int, default=5, help='Arguments submitted per debate')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Stub Gemini latency in seconds')
+    parser.add_argument('--llm-jitter', type=float, default=0.1, help='Uniform jitter added to the LLM latency')
+    parser.add_argument('--chunk-latency', type=float, default=0.05, help='Delay between streamed chunks')
+    parser.add_argument('--llm-failure-rate', type=float, default=0.0, help='Fraction of stub LLM calls that fail')
+    parser.add_argument('--tts-latency', type=float, default=0.2, help='Stub TTS latency per utterance')
+    parser.add_argument('--stream', action='store_true', help='Request streamed AI responses')
+    parser.add_argument('--audio-wait', type=float, default=5.0, help='Seconds to wait for outstanding audio_ready events')
+    parser.add_argument('--label', default='', help='Free-form label stored with the results')
+    parser.add_argument('--output', default=RESULTS_DIR, help='Directory for result files')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    return parser.parse_args(argv)
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.events = defaultdict(int)
+
+    def timed(self, name, call):
+        start = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.latencies[name].append(elapsed)
+            if response.status_code >= 400:
+                self.errors[name] += 1
+        return response
+
+    def count_events(self, received):
+        with self.lock:
+            for event in received:
+                self.events[event['name']] += 1
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+def simulate_user(app, socketio, number, args, recorder):
+    client = app.test_client()
+    email = f'bench{number}@example.com'
+    password = 'bench-password'
+
+    recorder.timed('auth.register', lambda: client.post('/auth/register', json={
+        'username': f'bench{number}', 'email': email, 'password': password
+    }))
+    recorder.timed('auth.login', lambda: client.post('/auth/login', json={
+        'email': email, 'password': password
+    }))
+    socket = socketio.test_client(app, flask_test_client=client)
+
+    response = recorder.timed('debate.start', lambda: client.post('/debate/start', json={
+        'topic': f'Benchmark topic {number % 5}',
+        'user_position': 'for' if number % 2 else 'against',
+        'first_speaker': 'ai' if number % 2 else 'user'
+    }))
+    if response.status_code >= 400:
+        return
+    debate_id = response.get_json()['debate_id']
+    socket.emit('join_debate', {'debate_id': debate_id})
+
+    for turn in range(args.turns):
+        recorder.timed('debate.submit', lambda: client.post('/debate/submit', json={
+            'debate_id': debate_id,
+            'argument': f'Argument {turn} from user {number}: ' + stubs.SENTENCES[turn % len(stubs.SENTENCES)],
+            'stream': args.stream
+        }))
+        recorder.count_events(socket.get_received())
+
+    recorder.timed('debate.evaluate', lambda: client.get(f'/debate/evaluate/{debate_id}'))
+
+    # Give background TTS jobs a chance to announce their audio
+    deadline = time.monotonic() + args.audio_wait
+    while time.monotonic() < deadline:
+        received = socket.get_received()
+        recorder.count_events(received)
+        if not received and recorder.events['audio_ready'] >= recorder.events['ai_response']:
+            break
+        time.sleep(0.1)
+    socket.disconnect()
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(args, recorder, duration):
+    endpoints = {}
+    total = 0
+    for name, values in sorted(recorder.latencies.items()):
+        total += len(values)
+        endpoints[name] = {
+            'count': len(values),
+            'errors': recorder.errors[name],
+            'mean': round(sum(values) / len(values), 4),
+            'p50': round(percentile(values, 0.50), 4),
+            'p95': round(percentile(values, 0.95), 4),
+            'p99': round(percentile(values, 0.99), 4)
+        }
+    return {
+        'label': args.label,
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'duration': round(duration, 3),
+        'requests': total,
+        'throughput_rps': round(total / duration, 2) if duration else None,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'endpoints': endpoints,
+        'socket_events': dict(recorder.events)
+    }
+
+def print_report(results, baseline=None):
+    print(f"\n{results['requests']} requests in {results['duration']}s "
+          f"({results['throughput_rps']} req/s), max RSS {results['max_rss_mb']} MB")
+    print(f"{'endpoint':<18}{'count':>7}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, stats in results['endpoints'].items():
+        line = (f"{name:<18}{stats['count']:>7}{stats['errors']:>8}"
+                f"{stats['p50']:>9.3f}{stats['p95']:>9.3f}{stats['p99']:>9.3f}")
+        previous = (baseline or {}).get('endpoints', {}).get(name)
+        if previous:
+            line += f"   p95 {stats['p95'] - previous['p95']:+.3f}s vs {baseline.get('commit') or 'baseline'}"
+        print(line)
+    print(f"socket events: {results['socket_events']}")
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Keep the database and generated audio out of the working tree
+    workdir = tempfile.mkdtemp(prefix='debate-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    stubs.install(
+        llm_latency=args.llm_latency,
+        llm_jitter=args.llm_jitter,
+        chunk_latency=args.chunk_latency,
+        llm_failure_rate=args.llm_failure_rate,
+        tts_latency=args.tts_latency
+    )
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.chdir(workdir)
+
+    from app import app, db, socketio
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+
+    recorder = Recorder()
+    threads = [
+        threading.Thread(target=simulate_user, args=(app, socketio, number, args, recorder))
+        for number in range(args.users)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    results = summarize(args, recorder, duration)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    os.makedirs(args.output, exist_ok=True)
+    filename = os.path.join(
+        args.output,
+        f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{results['commit'] or 'nogit'}.json"
+    )
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {filename}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Measure how long a fresh worker takes to import the app.
+
+Each run imports `app` in a new interpreter, as a gunicorn worker would,
+and reports the import time and peak memory. With --warm-up, the time to
+initialize each provider (Gemini client, TTS workers) is measured too.
+
+    python -m benchmarks.startup --runs 5 --warm-up
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, os, resource, sys, time
+sys.path.insert(0, {root!r})
+if {stub!r}:
+    from benchmarks import stubs
+    stubs.install(llm_latency=0, llm_jitter=0, tts_latency=0)
+start = time.perf_counter()
+import app
+result = {{'import_seconds': time.perf_counter() - start}}
+if {warm_up!r}:
+    from providers import providers
+    result['warm_up'] = providers.warm_up()
+result['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(result))
+"""
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start')
+    parser.add_argument('--warm-up', action='store_true', help='Also time provider initialization')
+    parser.add_argument('--stub', action='store_true', help='Use the stub Gemini and pyttsx3 backends')
+    return parser.parse_args(argv)
+
+def run_once(args, workdir):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}")
+    code = PROBE.format(root=ROOT, stub=args.stub, warm_up=args.warm_up)
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=workdir, env=env, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='debate-startup-')
+    results = [run_once(args, workdir) for _ in range(args.runs)]
+
+    imports = [result['import_seconds'] for result in results]
+    print(f"import app: median {statistics.median(imports):.3f}s, "
+          f"min {min(imports):.3f}s, max {max(imports):.3f}s over {len(imports)} runs")
+    print(f"peak RSS: {max(result['max_rss_mb'] for result in results):.1f} MB")
+    if args.warm_up:
+        for name in results[0]['warm_up']:
+            timings = [result['warm_up'][name] for result in results]
+            print(f"warm-up {name}: median {statistics.median(timings):.3f}s")
+
+if __name__ == '__main__':
+    main()
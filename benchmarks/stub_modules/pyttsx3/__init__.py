@@ -0,0 +1,43 @@
+"""Deterministic stand-in for pyttsx3 used by the benchmark harness.
+
+It is put first on sys.path by benchmarks.stubs, so the TTS pool's spawned
+worker processes import it instead of the real driver. Synthesis sleeps
+for BENCH_TTS_LATENCY seconds plus BENCH_TTS_LATENCY_PER_CHAR per character
+and writes a silent WAV whose length follows the text.
+"""
+import os
+import time
+import wave
+
+SAMPLE_RATE = 16000
+
+class Engine:
+    def __init__(self):
+        self.properties = {}
+        self.pending = []
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def save_to_file(self, text, filename):
+        self.pending.append((text, filename))
+
+    def runAndWait(self):
+        base = float(os.environ.get('BENCH_TTS_LATENCY', 0.2))
+        per_char = float(os.environ.get('BENCH_TTS_LATENCY_PER_CHAR', 0.001))
+        for text, filename in self.pending:
+            time.sleep(base + per_char * len(text))
+            # Roughly 15 characters of speech per second
+            frames = int(SAMPLE_RATE * max(len(text) / 15, 0.1))
+            with wave.open(filename, 'wb') as output:
+                output.setnchannels(1)
+                output.setsampwidth(2)
+                output.setframerate(SAMPLE_RATE)
+                output.writeframes(b'\x00\x00' * frames)
+        self.pending = []
+
+def init(driverName=None, debug=False):
+    return Engine()
@@ -0,0 +1,98 @@
+"""Deterministic, latency-configurable stand-ins for Gemini and pyttsx3.
+
+`install()` must run before the app is imported. It puts the stub pyttsx3
+package first on sys.path (spawned TTS workers inherit sys.path) and
+replaces google.generativeai.GenerativeModel with StubGenerativeModel.
+"""
+import hashlib
+import os
+import random
+import sys
+import time
+
+STUB_MODULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_modules')
+
+SENTENCES = [
+    "The evidence points clearly in one direction.",
+    "History shows that bold policies deliver lasting results.",
+    "We must weigh the costs against the benefits honestly.",
+    "My opponent ignores the people this affects most.",
+    "Every serious study reaches the same conclusion.",
+    "Good intentions are no substitute for good outcomes.",
+]
+
+class StubChunk:
+    def __init__(self, text):
+        self.text = text
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubStream:
+    def __init__(self, text, chunk_latency):
+        self.words = text.split(' ')
+        self.chunk_latency = chunk_latency
+
+    def __iter__(self):
+        for index in range(0, len(self.words), 4):
+            time.sleep(self.chunk_latency)
+            yield StubChunk(' '.join(self.words[index:index + 4]) + ' ')
+
+class StubGenerativeModel:
+    """Replies deterministically to each prompt after a configurable delay"""
+
+    latency = 0.5
+    jitter = 0.1
+    chunk_latency = 0.05
+    failure_rate = 0.0
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None, **kwargs):
+        seed = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        time.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError('Stub Gemini failure')
+
+        text = self.reply(prompt, rng)
+        if stream:
+            return StubStream(text, self.chunk_latency)
+        return StubResponse(text)
+
+    def reply(self, prompt, rng):
+        if 'professional debate judge analyzing' in prompt:
+            score = rng.randint(55, 95)
+            return (
+                f"Score: {score}/100\n"
+                f"Breakdown: {{\"logic\": {rng.randint(15, 30)}, \"evidence\": {rng.randint(10, 25)}, "
+                f"\"rebuttal\": {rng.randint(8, 20)}, \"persuasiveness\": {rng.randint(6, 15)}, "
+                f"\"rhetoric\": {rng.randint(4, 10)}}}\n"
+                "Strengths:\n- Clear structure\n- Relevant examples\n- Confident tone\n\n"
+                "Improvements:\n- Cite sources\n- Address counterpoints\n- Tighten conclusions\n\n"
+                "Final Remarks: A solid performance."
+            )
+        if 'scoring one argument' in prompt:
+            return f"Score: {rng.randint(50, 95)}/100\nFeedback: {rng.choice(SENTENCES)}"
+        if 'concise notes on a debate' in prompt:
+            return ' '.join(rng.sample(SENTENCES, 3))
+        return ' '.join(rng.sample(SENTENCES, rng.randint(2, 3)))
+
+def install(llm_latency=0.5, llm_jitter=0.1, chunk_latency=0.05, llm_failure_rate=0.0,
+            tts_latency=0.2, tts_latency_per_char=0.001):
+    os.environ['BENCH_TTS_LATENCY'] = str(tts_latency)
+    os.environ['BENCH_TTS_LATENCY_PER_CHAR'] = str(tts_latency_per_char)
+    if STUB_MODULES not in sys.path:
+        sys.path.insert(0, STUB_MODULES)
+    sys.modules.pop('pyttsx3', None)
+
+    StubGenerativeModel.latency = llm_latency
+    StubGenerativeModel.jitter = llm_jitter
+    StubGenerativeModel.chunk_latency = chunk_latency
+    StubGenerativeModel.failure_rate = llm_failure_rate
+
+    import google.generativeai as genai
+    genai.GenerativeModel = StubGenerativeModel
+    genai.configure = lambda **kwargs: None
@@ -0,0 +1,268 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from sqlalchemy import or_
+from db_init import app, db
+from models import Debate, User
+from ai_utils import evaluation_prompt, route_llm, parse_score, llm_router, EVALUATION_SETTINGS
+from scoring import aggregate_evaluation
+from progress import record_evaluation
+from rate_limit import RateLimiter, RateLimited, pause
+from storage import end_transaction
+from metrics import FAILURES
+
+logger = logging.getLogger(__name__)
+
+def resolve_user_ids(values):
+    """Map user IDs or email addresses to user IDs"""
+    if isinstance(values, (str, int)):
+        values = [values]
+    ids = [int(value) for value in values if str(value).isdigit()]
+    emails = [value for value in values if not str(value).isdigit()]
+    query = db.session.query(User.id).filter(or_(User.id.in_(ids), User.email.in_(emails)))
+    return [user_id for (user_id,) in query]
+
+def select_debates(user_ids=None, since=None, until=None, topic=None, limit=None):
+    """IDs of debates matching the filters whose evaluation is missing or out of date"""
+    query = db.session.query(Debate.id).filter(
+        Debate.turn_count > 0,
+        or_(
+            Debate.evaluation.is_(None),
+            Debate.evaluated_turn_count.is_(None),
+            Debate.evaluated_turn_count != Debate.turn_count
+        )
+    )
+    if user_ids is not None:
+        query = query.filter(Debate.user_id.in_(user_ids))
+    if since:
+        query = query.filter(Debate.created_at >= since)
+    if until:
+        query = query.filter(Debate.created_at < until)
+    if topic:
+        query = query.filter(Debate.topic.ilike(f'%{topic}%'))
+    query = query.order_by(Debate.created_at, Debate.id)
+    if limit:
+        query = query.limit(limit)
+    return [debate_id for (debate_id,) in query]
+
+class BulkEvaluation:
+    """Evaluate many debates concurrently, committing results in batches.
+
+    LLM calls run on `workers` threads and are limited to `rate_limit`
+    calls and `token_limit` tokens a minute on each provider. Results are
+    written `batch_size` at a time from the calling thread. Debates whose
+    evaluation is already current are skipped, as are those that gained
+    turns while being evaluated, so an interrupted run can simply be
+    started again.
+    """
+
+    def __init__(self, debate_ids, workers=4, batch_size=20, rate_limit=60, token_limit=120000, on_progress=None):
+        self.id = uuid.uuid4().hex
+        self.debate_ids = list(debate_ids)
+        self.workers = max(workers, 1)
+        self.batch_size = max(batch_size, 1)
+        self.on_progress = on_progress
+        self.limiter = RateLimiter(window=60, max_requests=rate_limit, max_tokens=token_limit, queue_size=0)
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.status = 'pending'
+        self.error = None
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def run(self):
+        self.status = 'running'
+        self.started_at = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bulk-evaluation')
+        pending = {}
+        results = []
+        debate_ids = iter(self.debate_ids)
+        exhausted = False
+        try:
+            while True:
+                # Inputs are loaded as workers free up, so memory stays bounded
+                while (not exhausted and len(pending) < self.workers * 2 and len(results) < self.batch_size
+                       and not self.cancelled.is_set()):
+                    debate_id = next(debate_ids, None)
+                    if debate_id is None:
+                        exhausted = True
+                        break
+                    self._prepare(debate_id, executor, pending, results)
+                if len(results) >= self.batch_size:
+                    self._write(results)
+                    results = []
+                if not pending:
+                    if exhausted or self.cancelled.is_set():
+                        break
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    debate_id, turn_count = pending.pop(future)
+                    evaluation = future.result()
+                    if evaluation is None:
+                        self._count(failed=1)
+                    else:
+                        results.append((debate_id, turn_count, evaluation))
+            self._write(results)
+            self.status = 'cancelled' if self.cancelled.is_set() else 'finished'
+        except BaseException as e:
+            # Keep whatever finished before the interruption
+            self.status = 'failed'
+            self.error = str(e) or type(e).__name__
+            self._write(results)
+            raise
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.finished_at = time.monotonic()
+            self._report()
+        return self.stats()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def stats(self):
+        elapsed = ((self.finished_at or time.monotonic()) - self.started_at) if self.started_at else 0
+        with self.lock:
+            done = self.completed + self.failed + self.skipped
+            return {
+                'id': self.id,
+                'status': self.status,
+                'error': self.error,
+                'total': len(self.debate_ids),
+                'completed': self.completed,
+                'failed': self.failed,
+                'skipped': self.skipped,
+                'remaining': len(self.debate_ids) - done,
+                'elapsed_seconds': round(elapsed, 1),
+                'per_minute': round(self.completed * 60 / elapsed, 1) if elapsed else None
+            }
+
+    def _prepare(self, debate_id, executor, pending, results):
+        debate = Debate.query.get(debate_id)
+        if debate is None or debate.evaluation_is_current():
+            self._count(skipped=1)
+            return
+
+        # Per-turn scores make the report without another LLM call
+        if app.config['INCREMENTAL_EVALUATION']:
+            evaluation = aggregate_evaluation(debate)
+            if evaluation is not None:
+                results.append((debate.id, debate.turn_count, evaluation))
+                return
+
+        args = (debate.get_transcript(speaker='user'), debate.summary)
+        key = (debate.id, debate.turn_count)
+        end_transaction(db)
+        pending[executor.submit(self._evaluate, *args)] = key
+
+    def _evaluate(self, transcript, summary):
+        """Run one evaluation, returning None if it failed or the run was cancelled"""
+        key = self._throttle()
+        if key is None:
+            return None
+        try:
+            provider, evaluation = route_llm('evaluation', evaluation_prompt(transcript, summary), EVALUATION_SETTINGS)
+        except Exception as e:
+            logger.error("Bulk evaluation call failed: %s", e)
+            FAILURES.inc(component='llm')
+            return None
+        # After a failover or hedge the call is charged to the provider that answered
+        if provider != key:
+            self.limiter.reassign(key, provider, app.config['EVALUATION_TOKEN_BUDGET'])
+        return evaluation if parse_score(evaluation) is not None else None
+
+    def _throttle(self):
+        """Wait for room in the budget of the provider the call will likely go to, returning its name"""
+        backends = llm_router.ranked('evaluation')
+        key = backends[0].name if backends else 'default'
+        while not self.cancelled.is_set():
+            try:
+                self.limiter.admit(key, app.config['EVALUATION_TOKEN_BUDGET'])
+                return key
+            except RateLimited as e:
+                pause(min(e.retry_after, 1.0))
+        return None
+
+    def _write(self, results):
+        if not results:
+            return
+        written = skipped = 0
+        try:
+            for debate_id, turn_count, evaluation in results:
+                debate = Debate.query.get(debate_id)
+                # New turns arrived meanwhile; the next run evaluates the full debate
+                if debate is None or debate.turn_count != turn_count:
+                    skipped += 1
+                    continue
+                debate.set_evaluation(evaluation, score=parse_score(evaluation))
+                record_evaluation(debate, evaluation)
+                written += 1
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Writing %s bulk evaluations failed: %s", len(results), e)
+            FAILURES.inc(component='bulk_evaluation')
+            self._count(failed=len(results))
+            return
+        self._count(completed=written, skipped=skipped)
+
+    def _count(self, completed=0, failed=0, skipped=0):
+        with self.lock:
+            self.completed += completed
+            self.failed += failed
+            self.skipped += skipped
+        self._report()
+
+    def _report(self):
+        if self.on_progress is not None:
+            self.on_progress(self.stats())
+
+class BulkEvaluationJobs:
+    """Bulk evaluations started from the admin API, run one at a time in the background"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def start(self, debate_ids, **options):
+        with self.lock:
+            if any(job.status in ('pending', 'running') for job in self.jobs.values()):
+                return None
+            job = BulkEvaluation(debate_ids, **options)
+            self.jobs[job.id] = job
+        thread = threading.Thread(target=self._run, args=(job,), name=f'bulk-evaluation-{job.id[:8]}', daemon=True)
+        thread.start()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _run(self, job):
+        with app.app_context():
+            try:
+                job.run()
+            except Exception as e:
+                logger.exception("Bulk evaluation %s failed: %s", job.id, e)
+
+def run_options(**overrides):
+    """Worker, batch and rate limit settings from the config, with overrides"""
+    options = {
+        'workers': app.config['BULK_EVALUATION_WORKERS'],
+        'batch_size': app.config['BULK_EVALUATION_BATCH_SIZE'],
+        'rate_limit': app.config['BULK_EVALUATION_RATE_LIMIT'],
+        'token_limit': app.config['BULK_EVALUATION_TOKEN_LIMIT']
+    }
+    options.update({name: value for name, value in overrides.items() if value is not None})
+    return options
+
+def parse_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+bulk_jobs = BulkEvaluationJobs()
@@ -0,0 +1,93 @@
+import click
+import time
+from db_init import app, db
+from models import Debate, DebateTurn, DebateEvaluation, UserProgress
+from ai_utils import tts_cache
+from progress import record_evaluation
+from debate_sessions import debate_sessions
+from bulk_evaluation import BulkEvaluation, select_debates, resolve_user_ids, run_options
+
+@app.cli.command('sweep-audio')
+@click.option('--grace', type=int, default=None, help='Keep files newer than this many seconds.')
+def sweep_audio(grace):
+    """Remove cached audio files that no transcript references."""
+    if grace is None:
+        grace = app.config['TTS_ORPHAN_GRACE_SECONDS']
+    
+    referenced = {
+        audio for (audio,) in
+        db.session.query(DebateTurn.audio).filter(DebateTurn.audio.isnot(None))
+    }
+    
+    removed = tts_cache.sweep_orphans(referenced, grace_seconds=grace)
+    evicted = tts_cache.enforce_quota()
+    usage = tts_cache.usage()
+    click.echo(f"Removed {removed} orphaned and {evicted} evicted audio files "
+               f"({usage['files']} files, {usage['bytes']} bytes remaining)")
+
+@app.cli.command('rebuild-progress')
+@click.option('--batch-size', type=int, default=200, help='Debates to commit at a time.')
+def rebuild_progress(batch_size):
+    """Rebuild structured evaluations and per-user progress from stored evaluations."""
+    DebateEvaluation.query.delete()
+    UserProgress.query.delete()
+    db.session.commit()
+    
+    # Oldest first so the rolling averages come out as if built live
+    debate_ids = [debate_id for (debate_id,) in db.session.query(Debate.id).filter(
+        Debate.evaluation.isnot(None),
+        Debate.score.isnot(None)
+    ).order_by(Debate.last_activity_at, Debate.id)]
+    
+    recorded = 0
+    for start in range(0, len(debate_ids), batch_size):
+        batch = debate_ids[start:start + batch_size]
+        debates = {debate.id: debate for debate in Debate.query.filter(Debate.id.in_(batch))}
+        for debate_id in batch:
+            debate = debates[debate_id]
+            if record_evaluation(debate, debate.get_evaluation(), evaluated_at=debate.last_activity_at):
+                recorded += 1
+        db.session.commit()
+    click.echo(f"Recorded {recorded} evaluations for {UserProgress.query.count()} users")
+
+@app.cli.command('evaluate-debates')
+@click.option('--user', 'users', multiple=True, help='User ID or email; may be repeated.')
+@click.option('--since', type=click.DateTime(), default=None, help='Only debates created on or after this date.')
+@click.option('--until', type=click.DateTime(), default=None, help='Only debates created before this date.')
+@click.option('--topic', default=None, help='Only debates whose topic contains this text.')
+@click.option('--limit', type=int, default=None, help='Evaluate at most this many debates.')
+@click.option('--workers', type=int, default=None, help='Concurrent evaluations.')
+@click.option('--batch-size', type=int, default=None, help='Evaluations to commit at a time.')
+@click.option('--rate-limit', type=int, default=None, help='LLM calls per minute per provider.')
+@click.option('--dry-run', is_flag=True, help='Only list the debates that would be evaluated.')
+def evaluate_debates(users, since, until, topic, limit, workers, batch_size, rate_limit, dry_run):
+    """Evaluate every matching debate whose evaluation is missing or out of date.
+    
+    Safe to interrupt: finished batches are kept, and running the same
+    command again picks up the remaining debates.
+    """
+    debate_sessions.flush_all()
+    user_ids = resolve_user_ids(users) if users else None
+    debate_ids = select_debates(user_ids, since, until, topic, limit)
+    if dry_run or not debate_ids:
+        click.echo(f"{len(debate_ids)} debates to evaluate")
+        return
+    
+    last_report = [0.0]
+    
+    def report(stats):
+        if stats['status'] == 'running' and time.monotonic() - last_report[0] < 2:
+            return
+        last_report[0] = time.monotonic()
+        click.echo(f"[{stats['total'] - stats['remaining']}/{stats['total']}] {stats['completed']} evaluated, "
+                   f"{stats['failed']} failed, {stats['skipped']} skipped, {stats['per_minute'] or 0}/min")
+    
+    job = BulkEvaluation(debate_ids, on_progress=report,
+                         **run_options(workers=workers, batch_size=batch_size, rate_limit=rate_limit))
+    try:
+        stats = job.run()
+    except KeyboardInterrupt:
+        click.echo("Interrupted; finished batches were saved. Run the command again to resume.")
+        return
+    click.echo(f"Done in {stats['elapsed_seconds']}s: {stats['completed']} evaluated, "
+               f"{stats['failed']} failed, {stats['skipped']} skipped")
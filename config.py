@@ -1,5 +1,7 @@
+import ipaddress
 import os
 from dotenv import load_dotenv
+from storage import engine_options
 
 load_dotenv()
 
@@ -7,8 +9,147 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'super-secret-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool sizing (ignored for SQLite) and SQLite lock wait, in seconds
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 30))
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        busy_timeout=SQLITE_BUSY_TIMEOUT
+    )
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
-    DEBATE_MODEL = "gemini-pro"  # Standard Gemini model that should be widely available
\ No newline at end of file
+    DEBATE_MODEL = "gemini-pro"  # Standard Gemini model that should be widely available
+    OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
+    # LLM providers to route between, in order of preference: gemini, openai, local
+    LLM_PROVIDERS = [name.strip() for name in os.environ.get('LLM_PROVIDERS', 'gemini').split(',') if name.strip()]
+    # Send AI rebuttals to the debate room as they are generated
+    STREAM_AI_RESPONSES = os.environ.get('STREAM_AI_RESPONSES', 'true').lower() == 'true'
+    # Background TTS queue
+    TTS_QUEUE_MAX_DEPTH = int(os.environ.get('TTS_QUEUE_MAX_DEPTH', 32))
+    TTS_QUEUE_WORKERS = int(os.environ.get('TTS_QUEUE_WORKERS', min(4, os.cpu_count() or 1)))
+    TTS_JOB_TIMEOUT = float(os.environ.get('TTS_JOB_TIMEOUT', 10))
+    # Voice settings and on-disk audio cache
+    TTS_RATE = int(os.environ.get('TTS_RATE', 180))
+    TTS_VOLUME = float(os.environ.get('TTS_VOLUME', 0.9))
+    TTS_VOICE = os.environ.get('TTS_VOICE')
+    TTS_CACHE_MAX_BYTES = int(os.environ.get('TTS_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+    # The quota is enforced after this many bytes are written, or on the first
+    # write this many seconds after the last sweep
+    TTS_CACHE_SWEEP_BYTES = int(os.environ.get('TTS_CACHE_SWEEP_BYTES', 25 * 1024 * 1024))
+    TTS_CACHE_SWEEP_INTERVAL = float(os.environ.get('TTS_CACHE_SWEEP_INTERVAL', 300))
+    TTS_ORPHAN_GRACE_SECONDS = int(os.environ.get('TTS_ORPHAN_GRACE_SECONDS', 3600))
+    # Worker processes that each own a pyttsx3 engine
+    TTS_POOL_SIZE = int(os.environ.get('TTS_POOL_SIZE', min(4, os.cpu_count() or 1)))
+    TTS_POOL_MAX_PENDING = int(os.environ.get('TTS_POOL_MAX_PENDING', 16))
+    DASHBOARD_PAGE_SIZE = int(os.environ.get('DASHBOARD_PAGE_SIZE', 20))
+    SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', 20))
+    # Progress aggregates: weight of the newest score in the rolling average,
+    # and how many top debates and past evaluations the progress view returns
+    PROGRESS_ROLLING_ALPHA = float(os.environ.get('PROGRESS_ROLLING_ALPHA', 0.3))
+    PROGRESS_BEST_TOPICS = int(os.environ.get('PROGRESS_BEST_TOPICS', 5))
+    PROGRESS_HISTORY_LIMIT = int(os.environ.get('PROGRESS_HISTORY_LIMIT', 100))
+    # Users allowed to run bulk evaluations through /admin, by email
+    ADMIN_EMAILS = [email.strip().lower() for email in os.environ.get('ADMIN_EMAILS', '').split(',') if email.strip()]
+    # Bulk evaluation: concurrent LLM calls, evaluations per commit, and the
+    # per-provider budget of calls and tokens a minute
+    BULK_EVALUATION_WORKERS = int(os.environ.get('BULK_EVALUATION_WORKERS', 4))
+    BULK_EVALUATION_BATCH_SIZE = int(os.environ.get('BULK_EVALUATION_BATCH_SIZE', 20))
+    BULK_EVALUATION_RATE_LIMIT = int(os.environ.get('BULK_EVALUATION_RATE_LIMIT', 30))
+    BULK_EVALUATION_TOKEN_LIMIT = int(os.environ.get('BULK_EVALUATION_TOKEN_LIMIT', 60000))
+    # Cache for AI replies to recurring prompts such as opening statements
+    AI_RESPONSE_CACHE_ENABLED = os.environ.get('AI_RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    AI_RESPONSE_CACHE_SIZE = int(os.environ.get('AI_RESPONSE_CACHE_SIZE', 512))
+    AI_RESPONSE_CACHE_TTL = int(os.environ.get('AI_RESPONSE_CACHE_TTL', 6 * 3600))
+    # Score each user turn in the background and aggregate at the end of a debate
+    INCREMENTAL_EVALUATION = os.environ.get('INCREMENTAL_EVALUATION', 'false').lower() == 'true'
+    TURN_SCORING_WORKERS = int(os.environ.get('TURN_SCORING_WORKERS', 2))
+    # Prompt sizing, in estimated tokens
+    PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', 800))
+    PROMPT_MAX_TURNS = int(os.environ.get('PROMPT_MAX_TURNS', 8))
+    EVALUATION_TOKEN_BUDGET = int(os.environ.get('EVALUATION_TOKEN_BUDGET', 2000))
+    TURN_TOKEN_LIMIT = int(os.environ.get('TURN_TOKEN_LIMIT', 300))
+    SUMMARY_TOKEN_LIMIT = int(os.environ.get('SUMMARY_TOKEN_LIMIT', 200))
+    # Turns older than the last SUMMARY_KEEP_RECENT are folded into the rolling
+    # summary, SUMMARY_BATCH_TURNS at a time
+    SUMMARY_KEEP_RECENT = int(os.environ.get('SUMMARY_KEEP_RECENT', 4))
+    SUMMARY_BATCH_TURNS = int(os.environ.get('SUMMARY_BATCH_TURNS', 4))
+    # LLM call deadlines, retries and circuit breaker
+    LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 20))
+    LLM_RETRIES = int(os.environ.get('LLM_RETRIES', 2))
+    LLM_RETRY_BACKOFF = float(os.environ.get('LLM_RETRY_BACKOFF', 0.5))
+    LLM_THREADPOOL_SIZE = int(os.environ.get('LLM_THREADPOOL_SIZE', 10))
+    LLM_BREAKER_THRESHOLD = int(os.environ.get('LLM_BREAKER_THRESHOLD', 5))
+    LLM_BREAKER_RESET = float(os.environ.get('LLM_BREAKER_RESET', 30))
+    # Synthesize AI replies sentence by sentence and stream each segment
+    TTS_PIPELINE = os.environ.get('TTS_PIPELINE', 'true').lower() == 'true'
+    # Compressed audio delivery ('mp3', 'ogg' or 'wav'); encoding needs ffmpeg
+    TTS_AUDIO_FORMAT = os.environ.get('TTS_AUDIO_FORMAT', 'mp3').lower()
+    TTS_AUDIO_BITRATE = os.environ.get('TTS_AUDIO_BITRATE', '48k')
+    TTS_KEEP_WAV = os.environ.get('TTS_KEEP_WAV', 'false').lower() == 'true'
+    # Observability
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 3))
+    # /metrics answers requests bearing METRICS_TOKEN or coming from these
+    # addresses or networks, and nothing else
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_NETWORKS = [
+        ipaddress.ip_network(network.strip(), strict=False)
+        for network in os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.1,::1').split(',') if network.strip()
+    ]
+    # Per-user sliding-window limits on the LLM-backed debate endpoints
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_WINDOW = float(os.environ.get('RATE_LIMIT_WINDOW', 60))
+    RATE_LIMIT_REQUESTS = int(os.environ.get('RATE_LIMIT_REQUESTS', 20))
+    RATE_LIMIT_TOKENS = int(os.environ.get('RATE_LIMIT_TOKENS', 20000))
+    RATE_LIMIT_QUEUE_SIZE = int(os.environ.get('RATE_LIMIT_QUEUE_SIZE', 16))
+    RATE_LIMIT_QUEUE_TIMEOUT = float(os.environ.get('RATE_LIMIT_QUEUE_TIMEOUT', 5))
+    # Process-wide caps on LLM calls and TTS syntheses running at once
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 8))
+    TTS_MAX_CONCURRENCY = int(os.environ.get('TTS_MAX_CONCURRENCY', 4))
+    # SocketIO message queue (e.g. redis://localhost:6379/0) shared by every
+    # worker so room emits fan out across processes; unset runs in-process
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'debate-socketio')
+    # Active debates cached in memory. The user's argument is written before the
+    # LLM call; AI replies are written in batches every DEBATE_FLUSH_INTERVAL
+    # seconds unless DEBATE_DURABLE_WRITES is set, so a crash can lose the last
+    # replies. A size of 0 disables the cache.
+    DEBATE_CACHE_SIZE = int(os.environ.get('DEBATE_CACHE_SIZE', 256))
+    DEBATE_CACHE_IDLE_TTL = float(os.environ.get('DEBATE_CACHE_IDLE_TTL', 900))
+    DEBATE_FLUSH_INTERVAL = float(os.environ.get('DEBATE_FLUSH_INTERVAL', 2))
+    DEBATE_DURABLE_WRITES = os.environ.get('DEBATE_DURABLE_WRITES', 'false').lower() == 'true'
+    # Backends to initialize in the background at startup instead of on first
+    # use, e.g. "gemini,tts"; empty keeps worker boot as fast as possible
+    WARMUP_PROVIDERS = [name.strip() for name in os.environ.get('WARMUP_PROVIDERS', '').split(',') if name.strip()]
+    # Users loaded for current_user, cached briefly to skip a query per request
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    # Provider routing: rolling latency/error window, health threshold, and
+    # hedging of debate turns once the first provider passes its p95 latency
+    LLM_STATS_WINDOW = int(os.environ.get('LLM_STATS_WINDOW', 50))
+    LLM_MAX_ERROR_RATE = float(os.environ.get('LLM_MAX_ERROR_RATE', 0.5))
+    LLM_HEDGE_ENABLED = os.environ.get('LLM_HEDGE_ENABLED', 'true').lower() == 'true'
+    LLM_HEDGE_DELAY = float(os.environ.get('LLM_HEDGE_DELAY', 3))
+    LLM_HEDGE_MIN_DELAY = float(os.environ.get('LLM_HEDGE_MIN_DELAY', 0.5))
+    # Draft the AI rebuttal (and its audio) from interim speech transcripts;
+    # reused on submit if the final argument still matches the drafted text
+    SPECULATION_ENABLED = os.environ.get('SPECULATION_ENABLED', 'false').lower() == 'true'
+    SPECULATION_MIN_WORDS = int(os.environ.get('SPECULATION_MIN_WORDS', 8))
+    SPECULATION_MIN_INTERVAL = float(os.environ.get('SPECULATION_MIN_INTERVAL', 3))
+    SPECULATION_MAX_INFLIGHT = int(os.environ.get('SPECULATION_MAX_INFLIGHT', 4))
+    SPECULATION_SIMILARITY = float(os.environ.get('SPECULATION_SIMILARITY', 0.9))
+    SPECULATION_MAX_AGE = float(os.environ.get('SPECULATION_MAX_AGE', 60))
+    SPECULATION_PREFETCH_TTS = os.environ.get('SPECULATION_PREFETCH_TTS', 'true').lower() == 'true'
+    # Per-user budget for drafts, on top of the request rate limit
+    SPECULATION_RATE_LIMIT = int(os.environ.get('SPECULATION_RATE_LIMIT', 6))
+    SPECULATION_TOKEN_LIMIT = int(os.environ.get('SPECULATION_TOKEN_LIMIT', 12000))
@@ -1,10 +1,16 @@
+import logging
 from flask import Flask
 from config import Config
-from extensions import db, socketio, init_extensions
+from extensions import db, socketio, emit_threadsafe, init_extensions
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
+logging.basicConfig(
+    level=app.config['LOG_LEVEL'],
+    format='%(asctime)s %(levelname)s [%(name)s] %(message)s'
+)
+
 # Initialize extensions
 init_extensions(app)
@@ -1,13 +1,66 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from db_init import db, socketio
-from models import Debate
-from ai_utils import generate_debate_response, evaluate_performance, generate_tts
-import json
-from datetime import datetime
+from db_init import app, db, socketio
+from models import Debate, UserProgress
+from ai_utils import (generate_debate_response, stream_debate_response, evaluate_performance, parse_score,
+                      tts_pool, llm_router, response_cache, llm_slots, tts_slots)
+from tts_queue import tts_queue
+from scoring import schedule_turn_score, aggregate_evaluation
+from summaries import maybe_schedule_summary
+from metrics import span, record_cache, RATE_LIMITED
+from prompt_builder import estimate_tokens
+from rate_limit import RateLimiter, RateLimited, client_key
+from storage import end_transaction
+from debate_sessions import debate_sessions
+from providers import providers
+from speculation import speculator
+from search import search_debates
+from progress import record_evaluation, progress_history
+from admin import is_admin
+import math
+import uuid
 
 debate_bp = Blueprint('debate', __name__)
 
+# Per-user budget for the endpoints that call the LLM
+request_limiter = RateLimiter(
+    window=app.config['RATE_LIMIT_WINDOW'],
+    max_requests=app.config['RATE_LIMIT_REQUESTS'],
+    max_tokens=app.config['RATE_LIMIT_TOKENS'],
+    queue_size=app.config['RATE_LIMIT_QUEUE_SIZE'],
+    queue_timeout=app.config['RATE_LIMIT_QUEUE_TIMEOUT']
+)
+
+def estimated_cost():
+    """Estimated LLM tokens for the current request, or None if it makes no LLM call"""
+    data = (request.get_json(silent=True) if request.is_json else request.form) or {}
+    if request.endpoint == 'debate.start_debate':
+        return app.config['PROMPT_TOKEN_BUDGET'] if data.get('first_speaker') == 'ai' else 0
+    if request.endpoint == 'debate.submit_argument':
+        return app.config['PROMPT_TOKEN_BUDGET'] + estimate_tokens(str(data.get('argument', '')))
+    if request.endpoint == 'debate.evaluate_debate':
+        return app.config['EVALUATION_TOKEN_BUDGET']
+    return None
+
+@debate_bp.before_request
+def admit_request():
+    if not app.config['RATE_LIMIT_ENABLED'] or not current_user.is_authenticated:
+        return None
+    tokens = estimated_cost()
+    if tokens is None:
+        return None
+    
+    try:
+        with span('rate_limit'):
+            request_limiter.admit(client_key(), tokens)
+    except RateLimited as e:
+        RATE_LIMITED.inc(endpoint=request.endpoint)
+        retry_after = max(1, math.ceil(e.retry_after))
+        response = jsonify({'error': 'Too many requests', 'retry_after': retry_after})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+    return None
+
 @debate_bp.route('/start', methods=['POST'])
 @login_required
 def start_debate():
@@ -21,36 +74,42 @@ def start_debate():
     if not data.get('topic') or not data.get('user_position') or not data.get('first_speaker'):
         return jsonify({'error': 'Missing required fields'}), 400
         
+    ai_position = 'for' if data['user_position'] == 'against' else 'against'
+    user_id = current_user.id
+    
+    # Generate the opening before touching the database so the write is short
+    ai_response = None
+    if data['first_speaker'] == 'ai':
+        end_transaction(db)
+        ai_response = generate_debate_response(data['topic'], ai_position, [])
+    
     debate = Debate(
         topic=data['topic'],
         user_position=data['user_position'],
-        ai_position='for' if data['user_position'] == 'against' else 'against',
-        user_id=current_user.id
+        ai_position=ai_position,
+        user_id=user_id
     )
     
     # Add initial message
-    transcript = []
-    if data['first_speaker'] == 'ai':
-        ai_response = generate_debate_response(
-            debate.topic, 
-            debate.ai_position,
-            transcript
-        )
-        audio_file = generate_tts(ai_response)
-        transcript.append({
-            'speaker': 'ai',
-            'text': ai_response,
-            'audio': audio_file,
-            'timestamp': datetime.utcnow().isoformat()
-        })
-    
-    debate.set_transcript(transcript)
     db.session.add(debate)
-    db.session.commit()
+    ai_turn = None
+    if ai_response is not None:
+        ai_turn = append_ai_turn(debate, ai_response)
+    
+    with span('db_commit'):
+        db.session.commit()
+    
+    # Audio is synthesized in the background and announced via audio_ready
+    transcript = []
+    audio_id = None
+    if ai_turn:
+        transcript.append(ai_turn.to_dict())
+        audio_id = queue_ai_audio(debate.id, transcript[0])
     
     return jsonify({
         'debate_id': debate.id,
-        'transcript': transcript
+        'transcript': transcript,
+        'audio_id': audio_id
     })
 
 @debate_bp.route('/submit', methods=['POST'])
@@ -66,58 +125,195 @@ def submit_argument():
     if not data.get('debate_id') or not data.get('argument'):
         return jsonify({'error': 'Missing required fields'}), 400
         
-    debate = Debate.query.get(data['debate_id'])
-    
-    # Add user argument
-    transcript = debate.get_transcript()
-    transcript.append({
-        'speaker': 'user',
-        'text': data['argument'],
-        'timestamp': datetime.utcnow().isoformat()
-    })
+    try:
+        debate_id = int(data['debate_id'])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid debate_id'}), 400
     
-    # Generate AI response
-    ai_response = generate_debate_response(
-        debate.topic,
-        debate.ai_position,
-        transcript
-    )
+    # Active debates are served from memory and their turns written behind
+    session = debate_sessions.get(debate_id)
+    if session is None:
+        return jsonify({'error': 'Debate not found'}), 404
+    if session.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
     
-    # Generate TTS and save audio
-    audio_file = generate_tts(ai_response)
+    # Add user argument, written before the LLM call so a crash cannot lose it
+    user_turn = debate_sessions.append_turn(session, 'user', data['argument'])
+    debate_sessions.flush(session)
     
-    transcript.append({
-        'speaker': 'ai',
-        'text': ai_response,
-        'audio': audio_file,
-        'timestamp': datetime.utcnow().isoformat()
-    })
+    # Recent turns not yet covered by the rolling summary
+    history = session.history(last=app.config['PROMPT_MAX_TURNS'])
+    prompt = (session.topic, session.ai_position, history, session.summary)
+    
+    # No transaction stays open while waiting on Gemini
+    end_transaction(db)
     
-    debate.set_transcript(transcript)
-    db.session.commit()
+    # Reuse the rebuttal drafted while the user was speaking, if it still fits
+    ai_response = speculator.claim(session.id, data['argument'], user_turn['turn_index'],
+                                   timeout=app.config['LLM_TIMEOUT'])
+    
+    # Generate AI response, streaming chunks to the debate room if enabled
+    if ai_response is None and wants_stream(data):
+        ai_response = stream_to_room(session.id, prompt)
+    elif ai_response is None:
+        ai_response = generate_debate_response(*prompt)
+    
+    ai_turn = debate_sessions.append_turn(
+        session,
+        'ai',
+        ai_response,
+        audio_id=uuid.uuid4().hex,
+        audio_status='pending'
+    )
+    
+    # Score the argument in the background so the final report only aggregates
+    if app.config['INCREMENTAL_EVALUATION']:
+        schedule_turn_score(session.id, user_turn['turn_index'])
+    maybe_schedule_summary(session)
+    
+    # Audio is synthesized in the background and announced via audio_ready
+    audio_id = queue_ai_audio(session.id, ai_turn)
     
     # Emit real-time response through SocketIO
-    socketio.emit('ai_response', {
-        'debate_id': debate.id,
-        'text': ai_response,
-        'audio_url': audio_file
-    }, room=f'debate_{debate.id}')
+    with span('socket_emit'):
+        socketio.emit('ai_response', {
+            'debate_id': session.id,
+            'text': ai_response,
+            'audio_url': None,
+            'audio_id': audio_id
+        }, room=f'debate_{session.id}')
     
     return jsonify({
         'ai_response': ai_response,
-        'audio_url': audio_file,
-        'transcript': transcript
+        'audio_url': None,
+        'audio_id': audio_id,
+        'turns': [user_turn, ai_turn]
     })
 
+def append_ai_turn(debate, text):
+    """Append an AI turn whose audio will be filled in by the TTS queue"""
+    return debate.append_turn(
+        'ai',
+        text,
+        audio_id=uuid.uuid4().hex,
+        audio_status='pending'
+    )
+
+def queue_ai_audio(debate_id, turn):
+    """Hand an AI turn to the TTS queue, returning its audio ID if accepted"""
+    with span('tts_enqueue'):
+        accepted = tts_queue.submit(turn['audio_id'], debate_id, turn['text'], pipelined=app.config['TTS_PIPELINE'])
+    if accepted:
+        return turn['audio_id']
+    
+    turn['audio_status'] = 'failed'
+    debate_sessions.update_turn(debate_id, {'audio_id': turn['audio_id']}, {'audio_status': 'failed'})
+    return None
+
+def wants_stream(data):
+    stream = data.get('stream')
+    if stream is None:
+        return app.config['STREAM_AI_RESPONSES']
+    if isinstance(stream, str):
+        return stream.lower() in ('1', 'true', 'yes')
+    return bool(stream)
+
+def stream_to_room(debate_id, prompt):
+    """Emit each chunk of the AI rebuttal as it arrives and return the full text"""
+    chunks = []
+    for chunk in stream_debate_response(*prompt):
+        chunks.append(chunk)
+        socketio.emit('ai_response_chunk', {
+            'debate_id': debate_id,
+            'index': len(chunks) - 1,
+            'text': chunk
+        }, room=f'debate_{debate_id}')
+    return ''.join(chunks).strip()
+
 @debate_bp.route('/evaluate/<int:debate_id>', methods=['GET'])
 @login_required
 def evaluate_debate(debate_id):
+    # Write any cached turns so the evaluation sees the whole debate
+    debate_sessions.flush_debate(debate_id)
     debate = Debate.query.get_or_404(debate_id)
     if debate.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    evaluation = evaluate_performance(debate.get_transcript())
-    debate.evaluation = json.dumps(evaluation)
-    db.session.commit()
+    # Serve the stored evaluation while the transcript is unchanged
+    current = debate.evaluation_is_current()
+    record_cache('evaluation', current)
+    if current:
+        return jsonify(debate.get_evaluation())
     
-    return jsonify(evaluation)
\ No newline at end of file
+    evaluation = None
+    if app.config['INCREMENTAL_EVALUATION']:
+        evaluation = aggregate_evaluation(debate)
+    if evaluation is None:
+        transcript = debate.get_transcript(speaker='user')
+        summary = debate.summary
+        end_transaction(db)
+        evaluation = evaluate_performance(transcript, summary)
+    score = parse_score(evaluation)
+    debate.set_evaluation(evaluation, score=score)
+    # Typed scores and the user's running aggregates, for the progress view;
+    # a failed re-evaluation takes the stale scores back out
+    record_evaluation(debate, evaluation)
+    with span('db_commit'):
+        db.session.commit()
+    
+    return jsonify(evaluation)
+
+@debate_bp.route('/progress', methods=['GET'])
+@login_required
+def progress():
+    limit = min(request.args.get('limit', app.config['PROGRESS_HISTORY_LIMIT'], type=int),
+                app.config['PROGRESS_HISTORY_LIMIT'])
+    summary = UserProgress.query.get(current_user.id)
+    return jsonify({
+        'summary': summary.to_dict() if summary else None,
+        'history': progress_history(current_user.id, max(limit, 1))
+    })
+
+@debate_bp.route('/search', methods=['GET'])
+@login_required
+def search_history():
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    hits, has_more = search_debates(current_user.id, query, page, app.config['SEARCH_PAGE_SIZE'])
+    for hit in hits:
+        hit['snippet'] = str(hit['snippet'])
+        hit['created_at'] = hit['created_at'].isoformat() if hit['created_at'] else None
+    return jsonify({
+        'query': query,
+        'page': page,
+        'results': hits,
+        'next_page': page + 1 if has_more else None
+    })
+
+@debate_bp.route('/tts/stats', methods=['GET'])
+@login_required
+def tts_stats():
+    # Process-wide state, not scoped to the user
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify({
+        'queue': tts_queue.stats(),
+        'pool': tts_pool.stats()
+    })
+
+@debate_bp.route('/llm/stats', methods=['GET'])
+@login_required
+def llm_stats():
+    # Process-wide state, not scoped to the user
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify({
+        'router': llm_router.stats(),
+        'response_cache': response_cache.stats(),
+        'rate_limit': request_limiter.stats(),
+        'debate_sessions': debate_sessions.stats(),
+        'llm_slots': llm_slots.stats(),
+        'tts_slots': tts_slots.stats(),
+        'providers': providers.stats(),
+        'speculation': speculator.stats()
+    })
\ No newline at end of file
@@ -0,0 +1,323 @@
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from db_init import app, db
+from models import Debate, DebateTurn
+from storage import is_transient
+from metrics import registry, span, record_cache, FAILURES
+
+logger = logging.getLogger(__name__)
+
+class DebateSession:
+    """Metadata and recent turns of an active debate, kept between requests"""
+
+    def __init__(self, debate, history_size):
+        self.id = debate.id
+        self.user_id = debate.user_id
+        self.topic = debate.topic
+        self.user_position = debate.user_position
+        self.ai_position = debate.ai_position
+        self.summary = debate.summary
+        self.summary_turn_count = debate.summary_turn_count or 0
+        self.turn_count = debate.turn_count or 0
+        self.last_activity_at = debate.last_activity_at
+        self.last_used = time.monotonic()
+        # Turns not yet written to the database, as DebateTurn column values
+        self.pending = []
+        self.recent = deque(maxlen=history_size)
+        recent = debate.get_transcript(since=self.summary_turn_count, last=history_size)
+        for offset, turn in enumerate(recent):
+            self.recent.append(dict(turn, turn_index=self.turn_count - len(recent) + offset))
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+    def history(self, last=None):
+        """Recent turns not yet covered by the rolling summary"""
+        with self.lock:
+            turns = [turn for turn in self.recent if turn['turn_index'] >= self.summary_turn_count]
+        return turns[-last:] if last else turns
+
+class DebateSessionCache:
+    """LRU cache of active debates with write-behind persistence of new turns.
+
+    Appended turns are held in memory and written in one batch every
+    `flush_interval` seconds, when the debate is evicted (LRU or after
+    `idle_ttl` seconds unused) and at shutdown, so turns written behind are
+    lost if the process dies first; callers flush() turns that must survive.
+    With `durable` set, every append is committed before it returns.
+    Anything that reads turns from the database should call flush_debate()
+    first.
+
+    Several worker processes may serve the same debate: writes lock the
+    Debate row and number turns after the stored count, and get() reloads
+    a cached copy once another process has written turns it has not seen.
+    """
+
+    def __init__(self, max_size=256, idle_ttl=900, flush_interval=2.0, durable=False, history_size=8):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.flush_interval = flush_interval
+        self.durable = durable
+        self.history_size = history_size
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.flushes = 0
+        self.flush_failures = 0
+
+    def get(self, debate_id):
+        """Return the session for `debate_id`, loading it on a miss, or None if it does not exist"""
+        self.start()
+        with self.lock:
+            session = self.sessions.get(debate_id)
+            if session is not None:
+                self.sessions.move_to_end(debate_id)
+                session.last_used = time.monotonic()
+        if session is not None and not self._is_current(session):
+            # Another worker wrote turns since this copy was loaded
+            self.flush(session)
+            self.discard(session)
+            session = None
+        record_cache('debate_session', session is not None)
+        if session is not None:
+            return session
+
+        debate = Debate.query.get(debate_id)
+        if debate is None:
+            return None
+        session = DebateSession(debate, self.history_size)
+        if self.max_size <= 0:
+            return session
+
+        with self.lock:
+            # Another request may have loaded it meanwhile; keep the first copy
+            session = self.sessions.setdefault(debate_id, session)
+            self.sessions.move_to_end(debate_id)
+            overflow = list(self.sessions.values())[:max(len(self.sessions) - self.max_size, 0)]
+            selected_at = time.monotonic()
+        for old in overflow:
+            # Spared if a request picks it up meanwhile
+            self._evict(old, unused_since=selected_at)
+        return session
+
+    def append_turn(self, session, speaker, text, **fields):
+        """Record a turn, returning it as a transcript dict"""
+        now = datetime.utcnow()
+        with session.lock:
+            row = dict(
+                debate_id=session.id,
+                turn_index=session.turn_count,
+                speaker=speaker,
+                text=text,
+                created_at=now,
+                **fields
+            )
+            session.pending.append(row)
+            session.turn_count += 1
+            session.last_activity_at = now
+            turn = {'speaker': speaker, 'text': text, 'timestamp': now.isoformat(), 'turn_index': row['turn_index']}
+            if speaker == 'ai':
+                turn.update(audio=fields.get('audio'), audio_id=fields.get('audio_id'),
+                            audio_status=fields.get('audio_status'))
+            session.recent.append(turn)
+
+        if self.durable or self.max_size <= 0:
+            self.flush(session)
+        return dict(turn)
+
+    def update_turn(self, debate_id, match, values):
+        """Update the turn matching `match`, in memory if it is still pending"""
+        session = self.peek(debate_id)
+        if session is not None:
+            # Holding flush_lock means a turn is either still pending or committed
+            with session.flush_lock:
+                with session.lock:
+                    for row in session.pending:
+                        if all(row.get(key) == value for key, value in match.items()):
+                            row.update(values)
+                            return
+                self._update_row(debate_id, match, values)
+                return
+        self._update_row(debate_id, match, values)
+
+    def set_fields(self, debate_id, **fields):
+        """Mirror a change written elsewhere, such as a new rolling summary"""
+        session = self.peek(debate_id)
+        if session is not None:
+            with session.lock:
+                for name, value in fields.items():
+                    setattr(session, name, value)
+
+    def peek(self, debate_id):
+        with self.lock:
+            return self.sessions.get(debate_id)
+
+    def discard(self, session):
+        with self.lock:
+            if self.sessions.get(session.id) is session:
+                del self.sessions[session.id]
+
+    def flush_debate(self, debate_id):
+        session = self.peek(debate_id)
+        if session is not None:
+            self.flush(session)
+
+    def flush(self, session):
+        """Write the session's pending turns, returning False if the write should be retried"""
+        with session.flush_lock:
+            with session.lock:
+                rows, session.pending = session.pending, []
+                last_activity_at = session.last_activity_at
+            if not rows:
+                return True
+
+            try:
+                renumbered = self._write_rows(session.id, rows, last_activity_at)
+            except Exception as e:
+                logger.exception("Failed to persist %d turns of debate %s", len(rows), session.id)
+                FAILURES.inc(component='debate_flush')
+                with self.lock:
+                    self.flush_failures += 1
+                if is_transient(e):
+                    with session.lock:
+                        # Retry with the next flush, keeping turn order
+                        session.pending[:0] = rows
+                    return False
+                # Retrying would fail the same way; the next request reloads from the database
+                logger.error("Dropped %d unsaved turns of debate %s", len(rows), session.id)
+                renumbered = True
+
+        if renumbered:
+            # This copy's turn numbers are out of date; the next request reloads it
+            self.discard(session)
+        with self.lock:
+            self.flushes += 1
+        return True
+
+    def flush_all(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            self.flush(session)
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        with self.lock:
+            idle = [session for session in self.sessions.values() if session.last_used < cutoff]
+        for session in idle:
+            self._evict(session, unused_since=cutoff)
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._run, name='debate-flusher', daemon=True)
+            self.thread.start()
+
+    def shutdown(self):
+        self.stopped.set()
+        self.flush_all()
+
+    def stats(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            stats = {'flushes': self.flushes, 'flush_failures': self.flush_failures}
+        stats.update({
+            'sessions': len(sessions),
+            'max_size': self.max_size,
+            'pending_turns': sum(len(session.pending) for session in sessions),
+            'durable': self.durable
+        })
+        return stats
+
+    def _evict(self, session, unused_since):
+        """Write the session's turns, then drop it unless it is needed again.
+
+        It stays cached until its turns are written, so update_turn() always
+        finds a turn either pending in memory or committed.
+        """
+        if not self.flush(session):
+            # Keep it cached so its unsaved turns are retried rather than lost
+            return
+        with session.flush_lock, self.lock:
+            if session.pending or session.last_used >= unused_since:
+                return
+            if self.sessions.get(session.id) is session:
+                del self.sessions[session.id]
+
+    def _is_current(self, session):
+        """True if the database holds no turns this copy does not know about"""
+        with session.lock:
+            expected = session.turn_count - len(session.pending)
+        stored = db.session.query(Debate.turn_count).filter_by(id=session.id).scalar()
+        return stored is not None and stored == expected
+
+    def _write_rows(self, debate_id, rows, last_activity_at):
+        """Write `rows`, numbering them again once if they clash with stored turns"""
+        try:
+            return self._write(debate_id, rows, last_activity_at)
+        except IntegrityError:
+            # The stored turn count is behind the turns themselves; number after the last turn
+            logger.warning("Turns of debate %s clash with stored turns, renumbering", debate_id)
+            self._write(debate_id, rows, last_activity_at, after_last_turn=True)
+            return True
+
+    def _write(self, debate_id, rows, last_activity_at, after_last_turn=False):
+        """Insert `rows` after the turns already stored, returning True if they had to be renumbered"""
+        with app.app_context(), span('db_commit'):
+            try:
+                # The row lock orders writers of one debate across worker processes;
+                # turn indexes come from the stored count, not this process's copy
+                stored = db.session.query(Debate.turn_count).filter_by(id=debate_id).with_for_update().scalar()
+                if stored is None:
+                    logger.warning("Debate %s no longer exists, dropping %d turns", debate_id, len(rows))
+                    db.session.rollback()
+                    return False
+                if after_last_turn:
+                    last = db.session.query(db.func.max(DebateTurn.turn_index)).filter_by(debate_id=debate_id).scalar()
+                    if last is not None:
+                        stored = max(stored, last + 1)
+                offset = stored - rows[0]['turn_index']
+                for row in rows:
+                    row['turn_index'] += offset
+                db.session.bulk_insert_mappings(DebateTurn, rows)
+                Debate.query.filter_by(id=debate_id).update({
+                    'turn_count': rows[-1]['turn_index'] + 1,
+                    'last_activity_at': last_activity_at
+                })
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return offset != 0
+
+    def _update_row(self, debate_id, match, values):
+        with app.app_context(), span('db_commit'):
+            DebateTurn.query.filter_by(debate_id=debate_id, **match).update(values)
+            db.session.commit()
+
+    def _run(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush_all()
+                self.evict_idle()
+            except Exception:
+                logger.exception("Debate flusher iteration failed")
+
+debate_sessions = DebateSessionCache(
+    max_size=app.config['DEBATE_CACHE_SIZE'],
+    idle_ttl=app.config['DEBATE_CACHE_IDLE_TTL'],
+    flush_interval=app.config['DEBATE_FLUSH_INTERVAL'],
+    durable=app.config['DEBATE_DURABLE_WRITES'],
+    history_size=app.config['PROMPT_MAX_TURNS']
+)
+atexit.register(debate_sessions.shutdown)
+
+registry.gauge('debate_sessions_cached', 'Active debates held in memory.', lambda: len(debate_sessions.sessions))
+registry.gauge('debate_turns_pending', 'Turns waiting to be written to the database.',
+               lambda: debate_sessions.stats()['pending_turns'])
@@ -1,8 +1,16 @@
+import threading
+from functools import partial
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_socketio import SocketIO
 from authlib.integrations.flask_client import OAuth
+from storage import init_storage
+
+try:
+    import gevent
+except ImportError:  # pragma: no cover - gevent is optional outside the SocketIO worker
+    gevent = None
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -12,11 +20,36 @@ login.login_view = 'login'  # This should match the route function name
 socketio = SocketIO()
 oauth = OAuth()
 
+# Event loop of the gevent hub serving requests; other threads must not touch it directly
+socket_loop = None
+
+def bind_socket_loop():
+    """Remember the serving hub's loop, once a request shows it runs on the main thread"""
+    global socket_loop
+    if socket_loop is None and gevent is not None and threading.current_thread() is threading.main_thread():
+        socket_loop = gevent.get_hub().loop
+
+def emit_threadsafe(event, data, room=None):
+    """socketio.emit for native worker threads: the send runs in a greenlet on the serving hub"""
+    if socket_loop is None or threading.current_thread() is threading.main_thread():
+        socketio.emit(event, data, room=room)
+        return
+    socket_loop.run_callback_threadsafe(gevent.spawn, partial(socketio.emit, event, data, room=room))
+
 def init_extensions(app):
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_storage(app, db)
+    migrate.init_app(app, db, render_as_batch=True)
     login.init_app(app)
-    socketio.init_app(app, async_mode='gevent')
+    # Without a message queue, events only reach sockets held by this process
+    socketio.init_app(
+        app,
+        async_mode='gevent',
+        message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
+        channel=app.config['SOCKETIO_CHANNEL']
+    )
+    # Outside a gevent server (tests, benchmarks) requests run on other threads and emits go direct
+    app.before_request(bind_socket_loop)
     oauth.init_app(app)
     
     # Register OAuth providers
@@ -2,7 +2,7 @@ from db_init import db, app
 import os
 
 # Import all models to ensure they're registered
-from models import User, Debate
+from models import User, Debate, DebateTurn, DebateEvaluation, UserProgress
 
 def init_db():
     # Create the database directory if it doesn't exist
@@ -0,0 +1,329 @@
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from rate_limit import pause
+
+class NoProviderAvailable(Exception):
+    """Raised when every configured LLM provider failed or is unhealthy"""
+
+class ProviderStats:
+    """Rolling latency and error rate over the last `window` calls"""
+
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, ok, latency=None):
+        with self.lock:
+            self.outcomes.append(ok)
+            if ok and latency is not None:
+                self.latencies.append(latency)
+
+    def error_rate(self):
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def percentile(self, fraction):
+        with self.lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return None
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self):
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        with self.lock:
+            calls = len(self.outcomes)
+        return {
+            'calls': calls,
+            'error_rate': round(self.error_rate(), 3),
+            'p50': round(p50, 3) if p50 is not None else None,
+            'p95': round(p95, 3) if p95 is not None else None
+        }
+
+class LLMBackend:
+    """One LLM provider, called through its own runtime and circuit breaker"""
+
+    name = None
+
+    def __init__(self, runtime, window=50):
+        self.runtime = runtime
+        self.window = window
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def generate(self, kind, prompt, settings, stream=False):
+        """Return the reply text, or an iterator of text chunks when streaming"""
+        raise NotImplementedError
+
+    def stats_for(self, kind):
+        with self.lock:
+            stats = self.stats.get(kind)
+            if stats is None:
+                stats = self.stats[kind] = ProviderStats(self.window)
+            return stats
+
+class GeminiBackend(LLMBackend):
+    name = 'gemini'
+
+    def __init__(self, runtime, sdk, model_name, timeout, window=50):
+        super().__init__(runtime, window)
+        self.sdk = sdk
+        self.model_name = model_name
+        self.timeout = timeout
+        self.clients = {}
+
+    def client(self, settings):
+        """Return a shared (model, generation_config) pair, creating it on first use"""
+        key = tuple(sorted(settings.items()))
+        client = self.clients.get(key)
+        if client is None:
+            with self.lock:
+                client = self.clients.get(key)
+                if client is None:
+                    genai = self.sdk()
+                    client = self.clients[key] = (
+                        genai.GenerativeModel(self.model_name),
+                        genai.types.GenerationConfig(**settings)
+                    )
+        return client
+
+    def generate(self, kind, prompt, settings, stream=False):
+        model, generation_config = self.client(settings)
+        response = model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            stream=stream,
+            request_options={'timeout': self.timeout}
+        )
+        if stream:
+            return (chunk.text for chunk in response if chunk.text)
+        return response.text
+
+class OpenAIBackend(LLMBackend):
+    name = 'openai'
+
+    def __init__(self, runtime, sdk, model_name, timeout, window=50):
+        super().__init__(runtime, window)
+        self.sdk = sdk
+        self.model_name = model_name
+        self.timeout = timeout
+
+    def generate(self, kind, prompt, settings, stream=False):
+        response = self.sdk().chat.completions.create(
+            model=self.model_name,
+            messages=[{'role': 'user', 'content': prompt}],
+            temperature=settings.get('temperature'),
+            top_p=settings.get('top_p'),
+            max_tokens=settings.get('max_output_tokens'),
+            stream=stream,
+            timeout=self.timeout
+        )
+        if stream:
+            return (
+                chunk.choices[0].delta.content for chunk in response
+                if chunk.choices and chunk.choices[0].delta.content
+            )
+        return response.choices[0].message.content
+
+class LocalBackend(LLMBackend):
+    """Deterministic offline replies for development and tests"""
+
+    name = 'local'
+
+    SENTENCES = (
+        "The evidence on this question points clearly in one direction.",
+        "We have to weigh the real costs against the promised benefits.",
+        "History shows that similar policies have had lasting effects.",
+        "My opponent overlooks the people most affected by this choice.",
+        "Good intentions are no substitute for good outcomes.",
+        "A fair reading of the facts supports my position.",
+    )
+
+    def generate(self, kind, prompt, settings, stream=False):
+        seed = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8], 16)
+        text = self.reply(kind, prompt, seed)
+        if stream:
+            return iter(re.findall(r'\S+\s*', text))
+        return text
+
+    def reply(self, kind, prompt, seed):
+        score = 50 + seed % 46
+        if kind == 'evaluation':
+            return (
+                f"Score: {score}/100\n"
+                f"Breakdown: {{\"logical_consistency\": {score}, \"evidence_quality\": {score - seed % 7}, "
+                f"\"rebuttal_effectiveness\": {score - seed % 5}, \"persuasiveness\": {score}, "
+                f"\"rhetorical_skill\": {score - seed % 3}}}\n"
+                "Strengths:\n- Clear position\n- Consistent reasoning\n- Stayed on topic\n\n"
+                "Improvements:\n- Cite specific evidence\n- Answer counterpoints directly\n- Tighten conclusions\n\n"
+                "Final Remarks: Evaluated offline by the local model."
+            )
+        if kind == 'scoring':
+            return (
+                f"Score: {score}/100\n"
+                f"Breakdown: {{\"logical_consistency\": {score}, \"evidence_quality\": {score - seed % 7}, "
+                f"\"rebuttal_effectiveness\": {score - seed % 5}, \"persuasiveness\": {score}, "
+                f"\"rhetorical_skill\": {score - seed % 3}}}\n"
+                "Strength: Clear position\n"
+                "Improvement: Cite specific evidence\n"
+                f"Feedback: {self.SENTENCES[seed % len(self.SENTENCES)]}"
+            )
+        if kind == 'summary':
+            match = re.search(r'\[NEW ARGUMENTS\](.*?)\[TASK\]', prompt, re.S)
+            words = (match.group(1) if match else prompt).split()
+            return ' '.join(words[:120])
+        start = seed % len(self.SENTENCES)
+        return ' '.join(self.SENTENCES[(start + offset) % len(self.SENTENCES)] for offset in range(3))
+
+class LLMRouter:
+    """Send each call to the fastest healthy provider, failing over in order.
+
+    Providers are ranked by rolling median latency for the kind of call,
+    falling back to their configured order; those with an open circuit or
+    an error rate above `max_error_rate` go last. A hedged call starts the
+    next provider if the first has not answered by its p95 latency, and
+    returns whichever finishes first.
+    """
+
+    def __init__(self, backends, max_error_rate=0.5, min_samples=5, hedge_delay=3.0, min_hedge_delay=0.5,
+                 hedge_workers=8):
+        self.backends = backends
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='llm-hedge')
+        self.lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def healthy(self, backend, kind):
+        if backend.runtime.breaker.state == 'open':
+            return False
+        stats = backend.stats_for(kind)
+        with stats.lock:
+            samples = len(stats.outcomes)
+        return samples < self.min_samples or stats.error_rate() <= self.max_error_rate
+
+    def ranked(self, kind):
+        """Backends in the order they should be tried, fastest healthy first"""
+        def priority(item):
+            position, backend = item
+            median = backend.stats_for(kind).percentile(0.5)
+            # Providers without latency data yet follow the measured ones, in configured order
+            return (not self.healthy(backend, kind), median is None, median or 0, position)
+        return [backend for _, backend in sorted(enumerate(self.backends), key=priority)]
+
+    def generate(self, kind, prompt, settings, hedge=False):
+        """Return (provider name, reply text)"""
+        backends = self.ranked(kind)
+        if hedge and len(backends) > 1:
+            return self._hedged(kind, prompt, settings, backends)
+
+        last_error = None
+        for number, backend in enumerate(backends):
+            if number:
+                with self.lock:
+                    self.failovers += 1
+            try:
+                return backend.name, self._attempt(backend, kind, prompt, settings)
+            except Exception as e:
+                last_error = e
+        raise last_error or NoProviderAvailable('No LLM provider configured')
+
+    def stream(self, kind, prompt, settings):
+        """Yield reply chunks, failing over only if nothing has been yielded yet"""
+        last_error = None
+        for number, backend in enumerate(self.ranked(kind)):
+            if number:
+                with self.lock:
+                    self.failovers += 1
+            received = False
+            start = time.perf_counter()
+            try:
+                chunks = backend.runtime.call(backend.generate, kind, prompt, settings, True)
+                for text in backend.runtime.iterate(chunks):
+                    received = True
+                    yield text
+            except Exception as e:
+                backend.stats_for(kind).record(False)
+                if received:
+                    raise
+                last_error = e
+                continue
+            # Total time, so streamed and whole replies of a kind rank on the same scale
+            backend.stats_for(kind).record(True, time.perf_counter() - start)
+            return
+        raise last_error or NoProviderAvailable('No LLM provider configured')
+
+    def stats(self):
+        with self.lock:
+            stats = {'hedges': self.hedges, 'hedge_wins': self.hedge_wins, 'failovers': self.failovers}
+        stats['providers'] = {
+            backend.name: {
+                'runtime': backend.runtime.stats(),
+                'kinds': {kind: stats.snapshot() for kind, stats in list(backend.stats.items())}
+            }
+            for backend in self.backends
+        }
+        return stats
+
+    def _attempt(self, backend, kind, prompt, settings):
+        start = time.perf_counter()
+        try:
+            text = backend.runtime.call(backend.generate, kind, prompt, settings)
+        except Exception:
+            backend.stats_for(kind).record(False)
+            raise
+        backend.stats_for(kind).record(True, time.perf_counter() - start)
+        return text
+
+    def _delay_for(self, backend, kind):
+        p95 = backend.stats_for(kind).percentile(0.95)
+        return max(p95 if p95 is not None else self.hedge_delay, self.min_hedge_delay)
+
+    def _hedged(self, kind, prompt, settings, backends):
+        remaining = list(backends)
+        running = {}
+        last_error = None
+
+        def launch():
+            backend = remaining.pop(0)
+            running[self.executor.submit(self._attempt, backend, kind, prompt, settings)] = backend
+
+        launch()
+        hedge_at = time.monotonic() + self._delay_for(backends[0], kind)
+        while running:
+            for future in [future for future in running if future.done()]:
+                backend = running.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if backend is not backends[0]:
+                    with self.lock:
+                        self.hedge_wins += 1
+                return backend.name, text
+
+            # Start the next provider when the current ones have failed or run late
+            if remaining and (not running or time.monotonic() >= hedge_at):
+                with self.lock:
+                    if running:
+                        self.hedges += 1
+                    else:
+                        self.failovers += 1
+                launch()
+                hedge_at = time.monotonic() + self._delay_for(backends[0], kind)
+            elif running:
+                pause(0.01)
+        raise last_error or NoProviderAvailable('No LLM provider configured')
@@ -0,0 +1,188 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+
+try:
+    import gevent
+    from gevent import Timeout as GeventTimeout
+except ImportError:  # pragma: no cover - gevent is optional outside the SocketIO worker
+    gevent = None
+    GeventTimeout = None
+
+@lru_cache(maxsize=None)
+def transient_errors():
+    # Imported on first use; google.api_core pulls in grpc, which is slow to load
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:  # pragma: no cover
+        return ()
+    return (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.TooManyRequests,
+        google_exceptions.InternalServerError,
+    )
+
+class LLMTimeout(Exception):
+    """Raised when an LLM call misses its deadline"""
+
+class CircuitOpenError(Exception):
+    """Raised without calling the backend while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, probing again after `reset_timeout` seconds"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def allow(self):
+        with self.lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.probing:
+                # Let a single probe through to test the backend
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+class LLMRuntime:
+    """Run blocking LLM client calls off the gevent hub with deadlines and retries.
+
+    Calls made from the SocketIO worker's greenlets are handed to gevent's
+    native thread pool, so waiting on Gemini does not freeze other sockets.
+    Calls from ordinary background threads use a plain thread pool.
+    """
+
+    def __init__(self, timeout=20, retries=2, backoff=0.5, pool_size=10, breaker=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker()
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='llm-call')
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.retried = 0
+        self.rejected = 0
+
+    def call(self, fn, *args, timeout=None, **kwargs):
+        """Call `fn` with a deadline, retrying transient errors with jittered backoff.
+
+        The breaker sees one outcome per call, after any retries, so a
+        single slow request cannot open the circuit on its own.
+        """
+        timeout = timeout or self.timeout
+        if not self.breaker.allow():
+            with self.lock:
+                self.rejected += 1
+            raise CircuitOpenError('LLM backend is unavailable')
+
+        attempt = 0
+        while True:
+            try:
+                result = self._run(fn, args, kwargs, timeout)
+            except Exception as e:
+                if attempt >= self.retries or not self.is_transient(e):
+                    self.breaker.record_failure()
+                    with self.lock:
+                        self.failures += 1
+                    raise
+                attempt += 1
+                with self.lock:
+                    self.retried += 1
+                self.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def iterate(self, iterator, timeout=None):
+        """Pull items from a blocking iterator, one deadline-bounded call per item"""
+        timeout = timeout or self.timeout
+        iterator = iter(iterator)
+        done = object()
+        while True:
+            item = self._run(next, (iterator, done), {}, timeout)
+            if item is done:
+                return
+            yield item
+
+    def is_transient(self, error):
+        return isinstance(error, (LLMTimeout,) + transient_errors())
+
+    def sleep(self, seconds):
+        if self._on_hub():
+            gevent.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'in_flight': self.in_flight,
+                'calls': self.calls,
+                'failures': self.failures,
+                'retried': self.retried,
+                'rejected': self.rejected,
+                'circuit': self.breaker.state
+            }
+
+    def _run(self, fn, args, kwargs, timeout):
+        with self.lock:
+            self.in_flight += 1
+            self.calls += 1
+        try:
+            if self._on_hub():
+                pool = gevent.get_hub().threadpool
+                pool.maxsize = max(pool.maxsize, self.pool_size)
+                try:
+                    return pool.spawn(fn, *args, **kwargs).get(timeout=timeout)
+                except GeventTimeout:
+                    raise LLMTimeout(f'LLM call exceeded {timeout}s')
+
+            try:
+                return self.executor.submit(fn, *args, **kwargs).result(timeout=timeout)
+            except FutureTimeout:
+                raise LLMTimeout(f'LLM call exceeded {timeout}s')
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def _on_hub(self):
+        # Greenlets serving requests run on the main thread's gevent hub
+        return gevent is not None and threading.current_thread() is threading.main_thread()
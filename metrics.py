@@ -0,0 +1,186 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{format_labels(self.labels, key)} {value}')
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['buckets'][index] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for key, entry in sorted(self.values.items()):
+                for bound, bucket_count in zip(self.buckets, entry['buckets']):
+                    labels = format_labels(self.labels + ('le',), key + (bound,))
+                    lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+                labels = format_labels(self.labels + ('le',), key + ('+Inf',))
+                lines.append(f'{self.name}_bucket{labels} {entry["count"]}')
+                lines.append(f'{self.name}_sum{format_labels(self.labels, key)} {entry["sum"]}')
+                lines.append(f'{self.name}_count{format_labels(self.labels, key)} {entry["count"]}')
+        return lines
+
+class Gauge:
+    """Gauge whose value is read from a callback when metrics are scraped"""
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.warning('Gauge %s failed: %s', self.name, e)
+            return []
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge', f'{self.name} {value}']
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, callback):
+        return self.register(Gauge(name, documentation, callback))
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'debate_request_seconds', 'Time spent handling a request.', labels=('endpoint',)
+)
+STAGE_SECONDS = registry.histogram(
+    'debate_stage_seconds', 'Time spent in each stage of a request or background job.',
+    labels=('endpoint', 'stage')
+)
+LLM_TOKENS = registry.counter(
+    'llm_tokens_total', 'Estimated tokens sent to and received from the LLM.', labels=('kind',)
+)
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Cache lookups by cache and result.', labels=('cache', 'result')
+)
+FAILURES = registry.counter(
+    'failures_total', 'Failures by component.', labels=('component',)
+)
+RATE_LIMITED = registry.counter(
+    'rate_limited_total', 'Requests rejected by the per-user rate limiter.', labels=('endpoint',)
+)
+
+def current_endpoint():
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'background'
+
+@contextmanager
+def span(stage):
+    """Time a stage, exporting it as a histogram and recording it on the current request"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, endpoint=current_endpoint(), stage=stage)
+        if has_request_context():
+            timings = g.setdefault('stage_timings', {})
+            timings[stage] = round(timings.get(stage, 0) + elapsed, 4)
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+def init_app(app):
+    """Time every request and log the ones slower than SLOW_REQUEST_SECONDS"""
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, endpoint=request.endpoint or 'unknown')
+
+        threshold = app.config['SLOW_REQUEST_SECONDS']
+        if threshold and elapsed >= threshold:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'endpoint': request.endpoint,
+                'path': request.path,
+                'status': response.status_code,
+                'duration': round(elapsed, 4),
+                'stages': g.get('stage_timings', {})
+            }))
+        return response
@@ -0,0 +1,106 @@
+"""add debate turns and backfill from transcript blobs
+
+Revision ID: 8b1e4d7a2c95
+Revises: 3f9c2a1b7d4e
+Create Date: 2026-10-18 10:03:17.884512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+from datetime import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4d7a2c95'
+down_revision = '3f9c2a1b7d4e'
+branch_labels = None
+depends_on = None
+
+
+debate = sa.table('debate',
+    sa.column('id', sa.Integer),
+    sa.column('transcript', sa.Text),
+    sa.column('turn_count', sa.Integer)
+)
+
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade():
+    op.create_table('debate_turn',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('debate_id', sa.Integer(), nullable=False),
+    sa.Column('turn_index', sa.Integer(), nullable=False),
+    sa.Column('speaker', sa.String(length=10), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('audio', sa.String(length=255), nullable=True),
+    sa.Column('audio_id', sa.String(length=32), nullable=True),
+    sa.Column('audio_status', sa.String(length=10), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['debate_id'], ['debate.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('debate_id', 'turn_index')
+    )
+    with op.batch_alter_table('debate_turn', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_debate_turn_debate_id'), ['debate_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_debate_turn_audio_id'), ['audio_id'], unique=False)
+
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('turn_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill one row per transcript entry
+    debate_turn = sa.table('debate_turn',
+        sa.column('debate_id', sa.Integer),
+        sa.column('turn_index', sa.Integer),
+        sa.column('speaker', sa.String),
+        sa.column('text', sa.Text),
+        sa.column('audio', sa.String),
+        sa.column('audio_id', sa.String),
+        sa.column('audio_status', sa.String),
+        sa.column('created_at', sa.DateTime)
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(debate.c.id, debate.c.transcript).where(debate.c.transcript.isnot(None))
+    ).fetchall()
+    for debate_id, transcript in rows:
+        try:
+            entries = json.loads(transcript)
+        except ValueError:
+            continue
+        if not entries:
+            continue
+
+        op.bulk_insert(debate_turn, [
+            {
+                'debate_id': debate_id,
+                'turn_index': index,
+                'speaker': entry.get('speaker', 'user'),
+                'text': entry.get('text', ''),
+                'audio': entry.get('audio'),
+                'audio_id': entry.get('audio_id'),
+                'audio_status': entry.get('audio_status') or ('ready' if entry.get('audio') else None),
+                'created_at': parse_timestamp(entry.get('timestamp'))
+            }
+            for index, entry in enumerate(entries)
+        ])
+        connection.execute(
+            debate.update().where(debate.c.id == debate_id).values(turn_count=len(entries))
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.drop_column('turn_count')
+
+    with op.batch_alter_table('debate_turn', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_debate_turn_audio_id'))
+        batch_op.drop_index(batch_op.f('ix_debate_turn_debate_id'))
+
+    op.drop_table('debate_turn')
@@ -0,0 +1,67 @@
+"""full-text search index over debate topics and turns
+
+Revision ID: a3d6f0c8e517
+Revises: e91f3c6d8a24
+Create Date: 2026-10-18 16:42:09.115304
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d6f0c8e517'
+down_revision = 'e91f3c6d8a24'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_TABLES = (
+    ('debate_topic_search', 'debate', 'topic'),
+    ('debate_turn_search', 'debate_turn', 'text'),
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for name, table, column in SEARCH_TABLES:
+            op.execute(
+                f"CREATE VIRTUAL TABLE {name} USING fts5("
+                f"{column}, content='{table}', content_rowid='id', tokenize='porter unicode61')"
+            )
+            op.execute(
+                f"CREATE TRIGGER {name}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {name}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {name}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {name}({name}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {name}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+                f"INSERT INTO {name}({name}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+                f"INSERT INTO {name}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            # Index the existing rows
+            op.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE INDEX ix_debate_topic_search ON debate "
+            "USING gin (to_tsvector('english', coalesce(topic, '')))"
+        )
+        op.execute(
+            "CREATE INDEX ix_debate_turn_search ON debate_turn "
+            "USING gin (to_tsvector('english', text))"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for name, table, column in SEARCH_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {name}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {name}")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_debate_turn_search")
+        op.execute("DROP INDEX IF EXISTS ix_debate_topic_search")
@@ -0,0 +1,64 @@
+"""structured evaluations and per-user progress
+
+Revision ID: b8e2c5f71d09
+Revises: a3d6f0c8e517
+Create Date: 2026-10-18 17:55:31.640227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2c5f71d09'
+down_revision = 'a3d6f0c8e517'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('debate_evaluation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('debate_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('logic', sa.Integer(), nullable=True),
+    sa.Column('evidence', sa.Integer(), nullable=True),
+    sa.Column('rebuttal', sa.Integer(), nullable=True),
+    sa.Column('persuasiveness', sa.Integer(), nullable=True),
+    sa.Column('rhetoric', sa.Integer(), nullable=True),
+    sa.Column('strengths', sa.Text(), nullable=True),
+    sa.Column('improvements', sa.Text(), nullable=True),
+    sa.Column('turn_count', sa.Integer(), nullable=True),
+    sa.Column('evaluated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['debate_id'], ['debate.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('debate_id')
+    )
+    with op.batch_alter_table('debate_evaluation', schema=None) as batch_op:
+        batch_op.create_index('ix_debate_evaluation_user_id_evaluated_at', ['user_id', 'evaluated_at'], unique=False)
+        batch_op.create_index('ix_debate_evaluation_user_id_score', ['user_id', 'score'], unique=False)
+
+    op.create_table('user_progress',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('evaluations', sa.Integer(), nullable=False),
+    sa.Column('score_total', sa.Integer(), nullable=False),
+    sa.Column('rolling_score', sa.Float(), nullable=True),
+    sa.Column('last_score', sa.Integer(), nullable=True),
+    sa.Column('criteria', sa.Text(), nullable=True),
+    sa.Column('best_topics', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Existing evaluations are parsed in by `flask rebuild-progress`
+
+
+def downgrade():
+    op.drop_table('user_progress')
+    with op.batch_alter_table('debate_evaluation', schema=None) as batch_op:
+        batch_op.drop_index('ix_debate_evaluation_user_id_score')
+        batch_op.drop_index('ix_debate_evaluation_user_id_evaluated_at')
+
+    op.drop_table('debate_evaluation')
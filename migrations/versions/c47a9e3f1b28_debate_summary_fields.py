@@ -0,0 +1,72 @@
+"""debate summary fields and dashboard index
+
+Revision ID: c47a9e3f1b28
+Revises: 8b1e4d7a2c95
+Create Date: 2026-10-18 11:26:05.203117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+import re
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a9e3f1b28'
+down_revision = '8b1e4d7a2c95'
+branch_labels = None
+depends_on = None
+
+
+debate = sa.table('debate',
+    sa.column('id', sa.Integer),
+    sa.column('created_at', sa.DateTime),
+    sa.column('evaluation', sa.Text),
+    sa.column('last_activity_at', sa.DateTime),
+    sa.column('score', sa.Integer)
+)
+debate_turn = sa.table('debate_turn',
+    sa.column('debate_id', sa.Integer),
+    sa.column('created_at', sa.DateTime)
+)
+
+
+def parse_score(evaluation):
+    try:
+        evaluation = json.loads(evaluation)
+    except (TypeError, ValueError):
+        pass
+    match = re.search(r'Score:\s*(\d{1,3})\s*/\s*100', evaluation if isinstance(evaluation, str) else '')
+    return min(int(match.group(1)), 100) if match else None
+
+
+def upgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_activity_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('score', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_debate_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+    connection = op.get_bind()
+    last_turn = (
+        sa.select(sa.func.max(debate_turn.c.created_at))
+        .where(debate_turn.c.debate_id == debate.c.id)
+        .scalar_subquery()
+    )
+    connection.execute(
+        debate.update().values(last_activity_at=sa.func.coalesce(last_turn, debate.c.created_at))
+    )
+
+    rows = connection.execute(
+        sa.select(debate.c.id, debate.c.evaluation).where(debate.c.evaluation.isnot(None))
+    ).fetchall()
+    for debate_id, evaluation in rows:
+        score = parse_score(evaluation)
+        if score is not None:
+            connection.execute(debate.update().where(debate.c.id == debate_id).values(score=score))
+
+
+def downgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.drop_index('ix_debate_user_id_created_at')
+        batch_op.drop_column('score')
+        batch_op.drop_column('last_activity_at')
@@ -0,0 +1,30 @@
+"""per-turn criterion scores and notes
+
+Revision ID: c6d1e8a4f297
+Revises: b8e2c5f71d09
+Create Date: 2026-10-18 19:12:08.417530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6d1e8a4f297'
+down_revision = 'b8e2c5f71d09'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('debate_turn', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('criteria', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('strength', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('improvement', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('debate_turn', schema=None) as batch_op:
+        batch_op.drop_column('improvement')
+        batch_op.drop_column('strength')
+        batch_op.drop_column('criteria')
@@ -0,0 +1,34 @@
+"""evaluation version and per-turn scores
+
+Revision ID: d5e8b2f4a613
+Revises: c47a9e3f1b28
+Create Date: 2026-10-18 12:41:52.660384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8b2f4a613'
+down_revision = 'c47a9e3f1b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('evaluated_turn_count', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('debate_turn', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('score', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('feedback', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('debate_turn', schema=None) as batch_op:
+        batch_op.drop_column('feedback')
+        batch_op.drop_column('score')
+
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.drop_column('evaluated_turn_count')
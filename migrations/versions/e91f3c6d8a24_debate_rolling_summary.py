@@ -0,0 +1,28 @@
+"""rolling debate summary
+
+Revision ID: e91f3c6d8a24
+Revises: d5e8b2f4a613
+Create Date: 2026-10-18 13:58:09.127745
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91f3c6d8a24'
+down_revision = 'd5e8b2f4a613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('summary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('summary_turn_count', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('debate', schema=None) as batch_op:
+        batch_op.drop_column('summary_turn_count')
+        batch_op.drop_column('summary')
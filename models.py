@@ -3,6 +3,10 @@ from flask_login import UserMixin
 from datetime import datetime
 import json
 from extensions import login
+from search import install_search_index
+
+# Evaluation criteria, in the order the judge is asked to score them
+CRITERIA = ('logic', 'evidence', 'rebuttal', 'persuasiveness', 'rhetoric')
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -13,20 +17,188 @@ class User(UserMixin, db.Model):
     debates = db.relationship('Debate', backref='user', lazy='dynamic')
 
 class Debate(db.Model):
+    __table_args__ = (db.Index('ix_debate_user_id_created_at', 'user_id', 'created_at'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     topic = db.Column(db.String(200))
     user_position = db.Column(db.String(10))  # 'for' or 'against'
     ai_position = db.Column(db.String(10))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    transcript = db.Column(db.Text)
+    transcript = db.Column(db.Text)  # Legacy JSON blob, superseded by DebateTurn rows
     evaluation = db.Column(db.Text)
+    # Summary fields kept up to date on write so listings never load the blobs
+    turn_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_activity_at = db.Column(db.DateTime, default=datetime.utcnow)
+    score = db.Column(db.Integer)
+    evaluated_turn_count = db.Column(db.Integer)  # turn_count the stored evaluation was made at
+    # Rolling summary of turns [0, summary_turn_count), maintained in the background
+    summary = db.Column(db.Text)
+    summary_turn_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    turns = db.relationship('DebateTurn', backref='debate', lazy='dynamic',
+                            order_by='DebateTurn.turn_index', cascade='all, delete-orphan')
+    
+    def get_transcript(self, speaker=None, last=None, since=0):
+        """Return turns as transcript dicts.
+        
+        Turns can be filtered by speaker, restricted to those at or after
+        turn index `since`, and limited to the last N.
+        """
+        if not self.turn_count:
+            transcript = json.loads(self.transcript) if self.transcript else []
+            transcript = transcript[since:]
+            if speaker:
+                transcript = [msg for msg in transcript if msg['speaker'] == speaker]
+            return transcript[-last:] if last else transcript
+        
+        query = self.turns
+        if since:
+            query = query.filter(DebateTurn.turn_index >= since)
+        if speaker:
+            query = query.filter_by(speaker=speaker)
+        if last:
+            turns = query.order_by(None).order_by(DebateTurn.turn_index.desc()).limit(last).all()
+            turns.reverse()
+        else:
+            turns = query.all()
+        return [turn.to_dict() for turn in turns]
+    
+    def append_turn(self, speaker, text, **fields):
+        """Add a single turn row without touching earlier turns"""
+        turn = DebateTurn(
+            debate=self,
+            turn_index=self.turn_count or 0,
+            speaker=speaker,
+            text=text,
+            **fields
+        )
+        self.turn_count = (self.turn_count or 0) + 1
+        self.last_activity_at = datetime.utcnow()
+        db.session.add(turn)
+        return turn
+    
+    def get_evaluation(self):
+        return json.loads(self.evaluation) if self.evaluation else None
     
-    def get_transcript(self):
-        return json.loads(self.transcript) if self.transcript else []
+    def evaluation_is_current(self):
+        """Turns are append-only, so the turn count identifies the transcript version"""
+        return bool(self.evaluation) and self.evaluated_turn_count == self.turn_count
+    
+    def set_evaluation(self, evaluation, score=None):
+        self.evaluation = json.dumps(evaluation)
+        self.score = score
+        # Failed evaluations carry no score and are retried on the next request
+        self.evaluated_turn_count = self.turn_count if score is not None else None
+        self.last_activity_at = datetime.utcnow()
+
+class DebateTurn(db.Model):
+    __table_args__ = (db.UniqueConstraint('debate_id', 'turn_index'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    debate_id = db.Column(db.Integer, db.ForeignKey('debate.id'), nullable=False, index=True)
+    turn_index = db.Column(db.Integer, nullable=False)
+    speaker = db.Column(db.String(10), nullable=False)  # 'user' or 'ai'
+    text = db.Column(db.Text, nullable=False)
+    audio = db.Column(db.String(255))
+    audio_id = db.Column(db.String(32), index=True)
+    audio_status = db.Column(db.String(10))  # 'pending', 'ready', 'failed' or 'evicted'
+    score = db.Column(db.Integer)  # Per-turn score for user turns, filled in the background
+    feedback = db.Column(db.Text)
+    criteria = db.Column(db.Text)  # JSON {criterion: score}
+    strength = db.Column(db.Text)
+    improvement = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def set_transcript(self, data):
-        self.transcript = json.dumps(data)
+    def to_dict(self):
+        data = {
+            'speaker': self.speaker,
+            'text': self.text,
+            'timestamp': (self.created_at or datetime.utcnow()).isoformat(),
+            'turn_index': self.turn_index
+        }
+        if self.speaker == 'ai':
+            data['audio'] = self.audio
+            data['audio_id'] = self.audio_id
+            data['audio_status'] = self.audio_status
+        return data
+    
+    def criterion_scores(self):
+        return json.loads(self.criteria) if self.criteria else {}
+
+class DebateEvaluation(db.Model):
+    """Parsed form of a debate's latest evaluation, one row per debate"""
+    __table_args__ = (
+        db.Index('ix_debate_evaluation_user_id_evaluated_at', 'user_id', 'evaluated_at'),
+        db.Index('ix_debate_evaluation_user_id_score', 'user_id', 'score'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    debate_id = db.Column(db.Integer, db.ForeignKey('debate.id'), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    # Criterion scores out of 100; None when the judge left one out
+    logic = db.Column(db.Integer)
+    evidence = db.Column(db.Integer)
+    rebuttal = db.Column(db.Integer)
+    persuasiveness = db.Column(db.Integer)
+    rhetoric = db.Column(db.Integer)
+    strengths = db.Column(db.Text)  # JSON list
+    improvements = db.Column(db.Text)  # JSON list
+    turn_count = db.Column(db.Integer)
+    evaluated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def criteria(self):
+        return {name: getattr(self, name) for name in CRITERIA}
+    
+    def to_dict(self):
+        return {
+            'debate_id': self.debate_id,
+            'score': self.score,
+            'criteria': self.criteria(),
+            'strengths': json.loads(self.strengths) if self.strengths else [],
+            'improvements': json.loads(self.improvements) if self.improvements else [],
+            'turn_count': self.turn_count,
+            'evaluated_at': self.evaluated_at.isoformat() if self.evaluated_at else None
+        }
+
+class UserProgress(db.Model):
+    """Per-user aggregates, updated each time one of their evaluations is saved"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    evaluations = db.Column(db.Integer, nullable=False, default=0)
+    score_total = db.Column(db.Integer, nullable=False, default=0)
+    rolling_score = db.Column(db.Float)  # Exponential moving average, recent debates weigh most
+    last_score = db.Column(db.Integer)
+    criteria = db.Column(db.Text)  # JSON {criterion: {"count", "total", "rolling"}}
+    best_topics = db.Column(db.Text)  # JSON list of the highest scoring debates
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        criteria = json.loads(self.criteria) if self.criteria else {}
+        summary = {}
+        for name in CRITERIA:
+            stats = criteria.get(name)
+            if not stats or not stats['count']:
+                summary[name] = None
+                continue
+            average = stats['total'] / stats['count']
+            summary[name] = {
+                'average': round(average, 1),
+                'rolling': round(stats['rolling'], 1),
+                # Positive when recent debates score above the long-run average
+                'trend': round(stats['rolling'] - average, 1)
+            }
+        return {
+            'evaluations': self.evaluations,
+            'average_score': round(self.score_total / self.evaluations, 1) if self.evaluations else None,
+            'rolling_score': round(self.rolling_score, 1) if self.rolling_score is not None else None,
+            'last_score': self.last_score,
+            'criteria': summary,
+            'best_topics': json.loads(self.best_topics) if self.best_topics else [],
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+# Full-text index over topics and turns, maintained by the database itself
+install_search_index(Debate.__table__, DebateTurn.__table__)
 
 def load_user(id):
     return User.query.get(int(id))
\ No newline at end of file
@@ -0,0 +1,39 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+try:
+    from gevent.threadpool import ThreadPool as GeventThreadPool
+except ImportError:  # pragma: no cover - gevent is optional outside the SocketIO worker
+    GeventThreadPool = None
+
+class PasswordHasher:
+    """Hash and verify passwords on a bounded pool of threads.
+
+    Hashing is deliberately slow, and hashlib releases the GIL while it
+    runs, so handing it to threads keeps the gevent hub serving other
+    sockets during a burst of logins. At most `workers` hashes run at once.
+    """
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self.hub_pool = None
+        self.lock = threading.Lock()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def _run(self, fn, *args):
+        if GeventThreadPool is not None and threading.current_thread() is threading.main_thread():
+            # Greenlets serving requests run on the main thread's gevent hub
+            with self.lock:
+                if self.hub_pool is None:
+                    self.hub_pool = GeventThreadPool(self.workers)
+            return self.hub_pool.spawn(fn, *args).get()
+        return self.executor.submit(fn, *args).result()
@@ -0,0 +1,120 @@
+import json
+from datetime import datetime
+from db_init import app, db
+from models import Debate, DebateEvaluation, UserProgress, CRITERIA
+from ai_utils import parse_evaluation
+
+def record_evaluation(debate, evaluation, evaluated_at=None):
+    """Store the parsed evaluation for `debate` and fold it into the user's progress.
+
+    Runs in the caller's transaction. A debate that is re-evaluated
+    replaces its earlier scores in the totals. An evaluation without a
+    score, or without any criterion scores (such as one aggregated from
+    turns scored before criteria were recorded), is left out of progress
+    and removes the debate's earlier evaluation, whose score is stale.
+    Returns the row, or None if nothing was stored.
+    """
+    parsed = parse_evaluation(evaluation)
+    if parsed['score'] is None or all(value is None for value in parsed['criteria'].values()):
+        discard_evaluation(debate)
+        return None
+
+    row = DebateEvaluation.query.filter_by(debate_id=debate.id).first()
+    previous = (row.score, row.criteria()) if row else None
+    if row is None:
+        row = DebateEvaluation(debate_id=debate.id, user_id=debate.user_id)
+        db.session.add(row)
+    row.score = parsed['score']
+    for name in CRITERIA:
+        setattr(row, name, parsed['criteria'].get(name))
+    row.strengths = json.dumps(parsed['strengths'])
+    row.improvements = json.dumps(parsed['improvements'])
+    row.turn_count = debate.turn_count
+    row.evaluated_at = evaluated_at or datetime.utcnow()
+
+    progress = locked_progress(debate.user_id)
+    update_progress(progress, previous, parsed, app.config['PROGRESS_ROLLING_ALPHA'])
+    refresh_progress(progress)
+    return row
+
+def discard_evaluation(debate):
+    """Delete the stored evaluation of `debate` and take its scores out of the user's totals"""
+    row = DebateEvaluation.query.filter_by(debate_id=debate.id).first()
+    if row is None:
+        return
+    progress = locked_progress(debate.user_id)
+    update_progress(progress, (row.score, row.criteria()), None, app.config['PROGRESS_ROLLING_ALPHA'])
+    db.session.delete(row)
+    refresh_progress(progress)
+
+def locked_progress(user_id):
+    # Locked so concurrent evaluations for one user do not lose updates
+    progress = UserProgress.query.filter_by(user_id=user_id).with_for_update().first()
+    if progress is None:
+        progress = UserProgress(user_id=user_id, evaluations=0, score_total=0)
+        db.session.add(progress)
+    return progress
+
+def refresh_progress(progress):
+    db.session.flush()
+    progress.best_topics = json.dumps(best_topics(progress.user_id, app.config['PROGRESS_BEST_TOPICS']))
+    progress.updated_at = datetime.utcnow()
+
+def update_progress(progress, previous, parsed, alpha):
+    """Swap `previous` (score, criteria) for the new scores in the running totals.
+
+    With `parsed` None the previous scores are only removed; rolling
+    averages keep their current value.
+    """
+    criteria = json.loads(progress.criteria) if progress.criteria else {}
+    if previous:
+        old_score, old_criteria = previous
+        progress.evaluations -= 1
+        progress.score_total -= old_score
+        for name, value in old_criteria.items():
+            if value is not None and name in criteria:
+                criteria[name]['count'] -= 1
+                criteria[name]['total'] -= value
+    if parsed is None:
+        progress.criteria = json.dumps(criteria)
+        return
+
+    score = parsed['score']
+    progress.evaluations += 1
+    progress.score_total += score
+    progress.last_score = score
+    progress.rolling_score = moving_average(progress.rolling_score, score, alpha)
+    for name, value in parsed['criteria'].items():
+        if value is None:
+            continue
+        stats = criteria.setdefault(name, {'count': 0, 'total': 0, 'rolling': None})
+        stats['count'] += 1
+        stats['total'] += value
+        stats['rolling'] = moving_average(stats['rolling'], value, alpha)
+    progress.criteria = json.dumps(criteria)
+
+def moving_average(current, value, alpha):
+    return value if current is None else alpha * value + (1 - alpha) * current
+
+def best_topics(user_id, limit=5):
+    """The user's highest scoring debates, read from the (user_id, score) index"""
+    rows = db.session.query(DebateEvaluation.debate_id, DebateEvaluation.score, Debate.topic).join(
+        Debate, Debate.id == DebateEvaluation.debate_id
+    ).filter(
+        DebateEvaluation.user_id == user_id
+    ).order_by(DebateEvaluation.score.desc(), DebateEvaluation.debate_id.desc()).limit(limit).all()
+    return [{'debate_id': debate_id, 'topic': topic, 'score': score} for debate_id, score, topic in rows]
+
+def progress_history(user_id, limit=100):
+    """The user's latest evaluations, oldest first, in one query on the (user_id, evaluated_at) index"""
+    rows = db.session.query(DebateEvaluation, Debate.topic).join(
+        Debate, Debate.id == DebateEvaluation.debate_id
+    ).filter(
+        DebateEvaluation.user_id == user_id
+    ).order_by(DebateEvaluation.evaluated_at.desc()).limit(limit).all()
+    history = []
+    for row, topic in reversed(rows):
+        entry = row.to_dict()
+        entry['topic'] = topic
+        history.append(entry)
+    return history
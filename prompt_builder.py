@@ -0,0 +1,26 @@
+def estimate_tokens(text):
+    """Rough token count, about four characters per token for English text"""
+    return (len(text) + 3) // 4 if text else 0
+
+def truncate_to_tokens(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(max_tokens * 4 - 3, 0)].rstrip() + '...'
+
+def pack_turns(turns, budget, turn_limit):
+    """Choose the most recent turns that fit in `budget` tokens, oldest first.
+
+    Each turn is truncated to `turn_limit` tokens so one long argument
+    cannot crowd out the rest. The newest turn is always included.
+    """
+    packed = []
+    used = 0
+    for msg in reversed(turns):
+        text = truncate_to_tokens(msg['text'], turn_limit)
+        cost = estimate_tokens(text) + 2  # speaker label and newline
+        if packed and used + cost > budget:
+            break
+        packed.append(dict(msg, text=text))
+        used += cost
+    packed.reverse()
+    return packed
@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class Provider:
+    """A backend created by `factory` the first time it is needed"""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.instance = None
+        self.initialized = False
+        self.init_seconds = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.initialized:
+            return self.instance
+        with self.lock:
+            if not self.initialized:
+                start = time.perf_counter()
+                try:
+                    self.instance = self.factory()
+                except Exception as e:
+                    # Left uninitialized so the next call tries again
+                    self.error = str(e)
+                    raise
+                self.init_seconds = time.perf_counter() - start
+                self.error = None
+                self.initialized = True
+                logger.info("Initialized provider %s in %.3fs", self.name, self.init_seconds)
+        return self.instance
+
+    def stats(self):
+        return {
+            'initialized': self.initialized,
+            'init_seconds': round(self.init_seconds, 4) if self.init_seconds is not None else None,
+            'error': self.error
+        }
+
+class ProviderRegistry:
+    """Named, lazily initialized backends such as the LLM client and TTS engine"""
+
+    def __init__(self):
+        self.providers = {}
+
+    def register(self, name, factory):
+        provider = self.providers[name] = Provider(name, factory)
+        return provider
+
+    def get(self, name):
+        return self.providers[name].get()
+
+    def warm_up(self, names=None):
+        """Initialize providers ahead of the first request, returning seconds per provider"""
+        timings = {}
+        for name in names or list(self.providers):
+            provider = self.providers.get(name)
+            if provider is None:
+                logger.warning("Unknown provider %s in warm-up list", name)
+                continue
+            start = time.perf_counter()
+            try:
+                provider.get()
+            except Exception as e:
+                logger.error("Warm-up of provider %s failed: %s", name, e)
+            timings[name] = round(time.perf_counter() - start, 4)
+        return timings
+
+    def warm_up_in_background(self, names=None):
+        thread = threading.Thread(target=self.warm_up, args=(names,), name='provider-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        return {name: provider.stats() for name, provider in self.providers.items()}
+
+providers = ProviderRegistry()
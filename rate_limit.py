@@ -0,0 +1,240 @@
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from flask import has_request_context, request
+from flask_login import current_user
+
+try:
+    import gevent
+except ImportError:  # pragma: no cover - gevent is optional outside the SocketIO worker
+    gevent = None
+
+class RateLimited(Exception):
+    """Raised when a client is over its budget and cannot be queued"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Rate limited, retry after {retry_after:.1f}s')
+        self.retry_after = retry_after
+
+class CapacityExceeded(Exception):
+    """Raised when no concurrency slot frees up before the deadline"""
+
+def pause(seconds):
+    # Yield to other greenlets when waiting on the gevent hub
+    if gevent is not None and threading.current_thread() is threading.main_thread():
+        gevent.sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+def client_key():
+    """Identify the caller: the logged-in user, else the remote address"""
+    if not has_request_context():
+        return None
+    if current_user.is_authenticated:
+        return f'user:{current_user.id}'
+    return f'ip:{request.remote_addr}'
+
+class RateLimiter:
+    """Sliding-window limit on requests and estimated tokens per client.
+
+    A request over budget waits in a short queue if its budget frees up
+    within `queue_timeout` seconds. Each waiting client may hold only its
+    fair share of the queue, so one busy client cannot crowd out others;
+    anything that cannot be queued raises RateLimited. Every `sweep_every`
+    admissions, clients with nothing left in the window are forgotten.
+    """
+
+    def __init__(self, window=60, max_requests=20, max_tokens=20000, queue_size=16, queue_timeout=5,
+                 sweep_every=1000):
+        self.window = window
+        self.max_requests = max_requests
+        self.max_tokens = max_tokens
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.sweep_every = max(sweep_every, 1)
+        self.history = {}
+        self.waiting = defaultdict(int)
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def admit(self, key, tokens=0):
+        tokens = min(tokens, self.max_tokens)
+        with self.lock:
+            wait = self._wait_time(key, tokens)
+            if wait == 0:
+                self._record(key, tokens)
+                return
+            if not self._can_queue(key, wait):
+                self.rejected += 1
+                raise RateLimited(wait)
+            self.waiting[key] += 1
+            self.queued += 1
+
+        deadline = time.monotonic() + self.queue_timeout
+        try:
+            while True:
+                pause(min(wait, max(deadline - time.monotonic(), 0)))
+                with self.lock:
+                    wait = self._wait_time(key, tokens)
+                    if wait == 0:
+                        self._record(key, tokens)
+                        return
+                    if time.monotonic() + wait > deadline:
+                        self.rejected += 1
+                        raise RateLimited(wait)
+        finally:
+            with self.lock:
+                self.waiting[key] -= 1
+                if not self.waiting[key]:
+                    del self.waiting[key]
+
+    def reassign(self, from_key, to_key, tokens=0):
+        """Move the latest admission of `tokens` from one key to another, such as the provider that served it"""
+        tokens = min(tokens, self.max_tokens)
+        with self.lock:
+            entries = self.history.get(from_key)
+            for index in range(len(entries or ()) - 1, -1, -1):
+                if entries[index][1] == tokens:
+                    del entries[index]
+                    break
+            if from_key in self.history and not entries:
+                del self.history[from_key]
+            self.history.setdefault(to_key, deque()).append((time.monotonic(), tokens))
+
+    def stats(self):
+        with self.lock:
+            return {
+                'clients': len(self.history),
+                'waiting': sum(self.waiting.values()),
+                'admitted': self.admitted,
+                'queued': self.queued,
+                'rejected': self.rejected
+            }
+
+    def _can_queue(self, key, wait):
+        if wait > self.queue_timeout or sum(self.waiting.values()) >= self.queue_size:
+            return False
+        clients = len(self.waiting) + (key not in self.waiting)
+        return self.waiting.get(key, 0) < max(1, self.queue_size // clients)
+
+    def _wait_time(self, key, tokens):
+        """Seconds until `key` may spend one more request and `tokens` tokens"""
+        now = time.monotonic()
+        entries = self.history.get(key)
+        if not entries:
+            return 0
+        while entries and entries[0][0] <= now - self.window:
+            entries.popleft()
+        if not entries:
+            del self.history[key]
+            return 0
+
+        count = len(entries)
+        spent = sum(cost for _, cost in entries)
+        if count < self.max_requests and spent + tokens <= self.max_tokens:
+            return 0
+        for timestamp, cost in entries:
+            count -= 1
+            spent -= cost
+            if count < self.max_requests and spent + tokens <= self.max_tokens:
+                return timestamp + self.window - now
+        return self.window
+
+    def _record(self, key, tokens):
+        now = time.monotonic()
+        self.history.setdefault(key, deque()).append((now, tokens))
+        self.admitted += 1
+        if self.admitted % self.sweep_every == 0:
+            self._sweep(now)
+
+    def _sweep(self, now):
+        """Drop clients whose newest request has left the window"""
+        cutoff = now - self.window
+        for key in [key for key, entries in self.history.items() if entries[-1][0] <= cutoff]:
+            del self.history[key]
+
+class ConcurrencyLimit:
+    """Cap on jobs running at once across the process.
+
+    When all slots are busy, the next free slot goes to the waiting client
+    holding the fewest slots, then the one served least recently, so
+    clients take turns instead of being served strictly in arrival order.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self.held = defaultdict(int)
+        self.waiters = {}
+        self.served = {}
+        self.tickets = itertools.count()
+        self.lock = threading.Lock()
+        self.timeouts = 0
+
+    @contextmanager
+    def slot(self, key=None, timeout=30):
+        self.acquire(key, timeout)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def acquire(self, key=None, timeout=30):
+        ticket = next(self.tickets)
+        with self.lock:
+            if self.active < self.limit and not self.waiters:
+                self._grant(key)
+                return
+            self.waiters[ticket] = key
+
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                with self.lock:
+                    if self.active < self.limit and self._next_ticket() == ticket:
+                        self._grant(key)
+                        return
+                if time.monotonic() >= deadline:
+                    with self.lock:
+                        self.timeouts += 1
+                    raise CapacityExceeded(f'No {self.name} slot free within {timeout}s')
+                pause(0.02)
+        finally:
+            with self.lock:
+                self.waiters.pop(ticket, None)
+                if not self.waiters:
+                    self.served.clear()
+
+    def release(self, key=None):
+        with self.lock:
+            self.active -= 1
+            self.held[key] -= 1
+            if not self.held[key]:
+                del self.held[key]
+            if not self.active and not self.waiters:
+                self.served.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'limit': self.limit,
+                'active': self.active,
+                'waiting': len(self.waiters),
+                'timeouts': self.timeouts
+            }
+
+    def _grant(self, key):
+        self.active += 1
+        self.held[key] += 1
+        self.served[key] = next(self.tickets)
+
+    def _next_ticket(self):
+        def priority(ticket):
+            key = self.waiters[ticket]
+            return (self.held.get(key, 0), self.served.get(key, -1), ticket)
+        return min(self.waiters, key=priority)
@@ -1,7 +1,18 @@
-from flask import render_template, redirect, url_for
+from flask import render_template, redirect, url_for, request, send_from_directory, Response, abort
 from flask_login import login_required, current_user
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import defer
+from datetime import datetime
+import ipaddress
+import os
 from db_init import app
 from models import Debate
+from metrics import registry
+from debate_sessions import debate_sessions
+from search import search_debates
+from tts_cache import is_cache_name
+
+AUDIO_MAX_AGE = 365 * 24 * 3600
 
 @app.route('/')
 def index():
@@ -10,9 +21,49 @@ def index():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    # Get user's debate history
-    debates = current_user.debates.order_by(Debate.created_at.desc()).all()
-    return render_template('dashboard.html', debates=debates)
+    # Get one page of the user's debate history, newest first. Pages are
+    # keyed on (created_at, id) so deep pages cost the same as the first.
+    page_size = app.config['DASHBOARD_PAGE_SIZE']
+    query = Debate.query.filter_by(user_id=current_user.id).options(
+        defer(Debate.transcript),
+        defer(Debate.evaluation)
+    )
+    
+    cursor = parse_cursor(request.args.get('before'))
+    if cursor:
+        created_at, debate_id = cursor
+        query = query.filter(or_(
+            Debate.created_at < created_at,
+            and_(Debate.created_at == created_at, Debate.id < debate_id)
+        ))
+    
+    debates = query.order_by(Debate.created_at.desc(), Debate.id.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(debates) > page_size:
+        debates = debates[:page_size]
+        last = debates[-1]
+        next_cursor = f"{last.created_at.isoformat()}_{last.id}"
+    
+    return render_template('dashboard.html', debates=debates, next_cursor=next_cursor)
+
+def parse_cursor(value):
+    """Decode a "<created_at>_<id>" dashboard cursor, ignoring malformed values"""
+    if not value:
+        return None
+    try:
+        created_at, debate_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(debate_id)
+    except ValueError:
+        return None
+
+@app.route('/search')
+@login_required
+def search():
+    # Ranked matches in topics and turns, served from the full-text index
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    hits, has_more = search_debates(current_user.id, query, page, app.config['SEARCH_PAGE_SIZE'])
+    return render_template('search.html', query=query, hits=hits, page=page, has_more=has_more)
 
 @app.route('/debate')
 @login_required
@@ -22,11 +73,42 @@ def debate():
 @app.route('/history/<int:debate_id>')
 @login_required
 def debate_history(debate_id):
+    debate_sessions.flush_debate(debate_id)
     debate = Debate.query.get_or_404(debate_id)
     if debate.user_id != current_user.id:
         return redirect(url_for('dashboard'))
     return render_template('history.html', debate=debate)
 
+@app.route('/audio/<path:filename>')
+def audio_file(filename):
+    # Partial files still being written or encoded are never served
+    if os.path.basename(filename).startswith('.'):
+        abort(404)
+    # Range requests and ETags are handled by send_from_directory
+    response = send_from_directory(os.path.abspath('static/audio'), filename, conditional=True)
+    # Cache files are content-addressed, so their URL never changes
+    if is_cache_name(os.path.basename(filename)):
+        response.headers['Cache-Control'] = f'public, max-age={AUDIO_MAX_AGE}, immutable'
+    return response
+
+def metrics_allowed():
+    """A valid bearer token, or a request from an allowed network"""
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') == f'Bearer {token}':
+        return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in network for network in app.config['METRICS_ALLOWED_NETWORKS'])
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Denied by default: traffic, failure counts and queue depths are not public
+    if not metrics_allowed():
+        abort(401 if app.config['METRICS_TOKEN'] else 403)
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/ai_config')
 @login_required
 def ai_config():
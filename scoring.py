@@ -0,0 +1,89 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from db_init import app, db
+from models import DebateTurn, CRITERIA
+from ai_utils import score_argument
+from storage import end_transaction
+from debate_sessions import debate_sessions
+
+# Background workers that score user turns as they are submitted
+executor = ThreadPoolExecutor(
+    max_workers=app.config['TURN_SCORING_WORKERS'],
+    thread_name_prefix='turn-scorer'
+)
+
+def schedule_turn_score(debate_id, turn_index):
+    executor.submit(score_turn, debate_id, turn_index)
+
+def score_turn(debate_id, turn_index):
+    # The turn may still be waiting in the debate session cache
+    debate_sessions.flush_debate(debate_id)
+    with app.app_context():
+        turn = DebateTurn.query.filter_by(debate_id=debate_id, turn_index=turn_index).first()
+        if not turn or turn.score is not None:
+            return
+
+        debate = turn.debate
+        opponent = DebateTurn.query.filter(
+            DebateTurn.debate_id == turn.debate_id,
+            DebateTurn.turn_index < turn.turn_index,
+            DebateTurn.speaker == 'ai'
+        ).order_by(DebateTurn.turn_index.desc()).first()
+
+        args = (debate.topic, debate.user_position, turn.text, opponent.text if opponent else None)
+        end_transaction(db)
+
+        result = score_argument(*args)
+        if result is None:
+            return
+
+        turn.score = result['score']
+        turn.feedback = result['feedback']
+        turn.criteria = json.dumps(result['criteria'])
+        turn.strength = result['strength']
+        turn.improvement = result['improvement']
+        db.session.commit()
+
+def aggregate_evaluation(debate):
+    """Build the final report from per-turn scores, or None if any user turn is unscored"""
+    turns = debate.turns.filter_by(speaker='user').all()
+    if not turns or any(turn.score is None for turn in turns):
+        return None
+
+    total = round(sum(turn.score for turn in turns) / len(turns))
+    ranked = sorted(turns, key=lambda turn: turn.score, reverse=True)
+
+    breakdown = {}
+    for name in CRITERIA:
+        values = [turn.criterion_scores().get(name) for turn in turns]
+        values = [value for value in values if value is not None]
+        if values:
+            breakdown[name] = round(sum(values) / len(values))
+    breakdown['per_turn'] = [turn.score for turn in turns]
+
+    lines = [
+        f"Score: {total}/100",
+        f"Breakdown: {json.dumps(breakdown)}"
+    ]
+    # Notes from the best arguments are the strengths, from the weakest the improvements
+    for heading, notes in (('Strengths', [turn.strength for turn in ranked]),
+                           ('Improvements', [turn.improvement for turn in reversed(ranked)])):
+        notes = list(dict.fromkeys(note for note in notes if note))[:3]
+        if notes:
+            lines.extend(["", f"{heading}:"] + [f"- {note}" for note in notes])
+
+    lines.extend(["", "Argument Analysis:"])
+    for number, turn in enumerate(turns, start=1):
+        excerpt = turn.text if len(turn.text) <= 120 else turn.text[:117] + '...'
+        lines.append(f"{number}. Argument: \"{excerpt}\"")
+        lines.append(f"   Score: {turn.score}/100")
+        lines.append(f"   Feedback: {turn.feedback or 'No feedback recorded.'}")
+        if turn.improvement:
+            lines.append(f"   Suggestion: {turn.improvement}")
+
+    lines.append("")
+    lines.append(
+        f"Final Remarks: Your strongest argument scored {ranked[0].score}/100 and "
+        f"your weakest {ranked[-1].score}/100 across {len(turns)} scored arguments."
+    )
+    return "\n".join(lines)
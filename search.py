@@ -0,0 +1,180 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, text
+from db_init import db
+
+# Unlikely to appear in user text; swapped for <mark> after escaping
+MARK_START = '\x02'
+MARK_STOP = '\x03'
+
+# FTS5 tables over debate.topic and debate_turn.text, kept in step by triggers
+# so every write path (including bulk inserts) updates the index
+SQLITE_DDL = {
+    'debate': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS debate_topic_search USING fts5("
+        "topic, content='debate', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS debate_topic_search_ai AFTER INSERT ON debate BEGIN "
+        "INSERT INTO debate_topic_search(rowid, topic) VALUES (new.id, new.topic); END",
+        "CREATE TRIGGER IF NOT EXISTS debate_topic_search_ad AFTER DELETE ON debate BEGIN "
+        "INSERT INTO debate_topic_search(debate_topic_search, rowid, topic) VALUES ('delete', old.id, old.topic); END",
+        "CREATE TRIGGER IF NOT EXISTS debate_topic_search_au AFTER UPDATE OF topic ON debate BEGIN "
+        "INSERT INTO debate_topic_search(debate_topic_search, rowid, topic) VALUES ('delete', old.id, old.topic); "
+        "INSERT INTO debate_topic_search(rowid, topic) VALUES (new.id, new.topic); END",
+    ),
+    'debate_turn': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS debate_turn_search USING fts5("
+        "text, content='debate_turn', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS debate_turn_search_ai AFTER INSERT ON debate_turn BEGIN "
+        "INSERT INTO debate_turn_search(rowid, text) VALUES (new.id, new.text); END",
+        "CREATE TRIGGER IF NOT EXISTS debate_turn_search_ad AFTER DELETE ON debate_turn BEGIN "
+        "INSERT INTO debate_turn_search(debate_turn_search, rowid, text) VALUES ('delete', old.id, old.text); END",
+        "CREATE TRIGGER IF NOT EXISTS debate_turn_search_au AFTER UPDATE OF text ON debate_turn BEGIN "
+        "INSERT INTO debate_turn_search(debate_turn_search, rowid, text) VALUES ('delete', old.id, old.text); "
+        "INSERT INTO debate_turn_search(rowid, text) VALUES (new.id, new.text); END",
+    ),
+}
+
+# Expression indexes; queries use the same expressions so the planner picks them up
+POSTGRES_DDL = {
+    'debate': (
+        "CREATE INDEX IF NOT EXISTS ix_debate_topic_search ON debate "
+        "USING gin (to_tsvector('english', coalesce(topic, '')))",
+    ),
+    'debate_turn': (
+        "CREATE INDEX IF NOT EXISTS ix_debate_turn_search ON debate_turn "
+        "USING gin (to_tsvector('english', text))",
+    ),
+}
+
+SQLITE_QUERY = """
+SELECT * FROM (
+    SELECT d.id AS debate_id, d.topic AS topic, d.created_at AS created_at,
+           NULL AS turn_index, NULL AS speaker,
+           snippet(debate_topic_search, 0, :start, :stop, '…', 16) AS snippet,
+           bm25(debate_topic_search) * 2 AS rank
+    FROM debate_topic_search JOIN debate d ON d.id = debate_topic_search.rowid
+    WHERE debate_topic_search MATCH :query AND d.user_id = :user_id
+    UNION ALL
+    SELECT d.id, d.topic, d.created_at, t.turn_index, t.speaker,
+           snippet(debate_turn_search, 0, :start, :stop, '…', 16),
+           bm25(debate_turn_search)
+    FROM debate_turn_search
+    JOIN debate_turn t ON t.id = debate_turn_search.rowid
+    JOIN debate d ON d.id = t.debate_id
+    WHERE debate_turn_search MATCH :query AND d.user_id = :user_id
+)
+ORDER BY rank, debate_id DESC, turn_index
+LIMIT :limit OFFSET :offset
+"""
+
+POSTGRES_QUERY = """
+WITH q AS (SELECT websearch_to_tsquery('english', :query) AS query)
+SELECT * FROM (
+    SELECT d.id AS debate_id, d.topic AS topic, d.created_at AS created_at,
+           NULL::integer AS turn_index, NULL AS speaker,
+           ts_headline('english', coalesce(d.topic, ''), q.query, :headline) AS snippet,
+           ts_rank(to_tsvector('english', coalesce(d.topic, '')), q.query) * 2 AS rank
+    FROM debate d, q
+    WHERE to_tsvector('english', coalesce(d.topic, '')) @@ q.query AND d.user_id = :user_id
+    UNION ALL
+    SELECT d.id, d.topic, d.created_at, t.turn_index, t.speaker,
+           ts_headline('english', t.text, q.query, :headline),
+           ts_rank(to_tsvector('english', t.text), q.query)
+    FROM debate_turn t JOIN debate d ON d.id = t.debate_id, q
+    WHERE to_tsvector('english', t.text) @@ q.query AND d.user_id = :user_id
+) hits
+ORDER BY rank DESC, debate_id DESC, turn_index
+LIMIT :limit OFFSET :offset
+"""
+
+LIKE_QUERY = """
+SELECT * FROM (
+    SELECT d.id AS debate_id, d.topic AS topic, d.created_at AS created_at,
+           NULL AS turn_index, NULL AS speaker, d.topic AS snippet
+    FROM debate d
+    WHERE lower(d.topic) LIKE :pattern AND d.user_id = :user_id
+    UNION ALL
+    SELECT d.id, d.topic, d.created_at, t.turn_index, t.speaker, t.text
+    FROM debate_turn t JOIN debate d ON d.id = t.debate_id
+    WHERE lower(t.text) LIKE :pattern AND d.user_id = :user_id
+) hits
+ORDER BY debate_id DESC, turn_index
+LIMIT :limit OFFSET :offset
+"""
+
+def install_search_index(*tables):
+    """Create the search index alongside `tables` whenever create_all() creates them"""
+    for table in tables:
+        for statement in SQLITE_DDL.get(table.name, ()):
+            event.listen(table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+        for statement in POSTGRES_DDL.get(table.name, ()):
+            event.listen(table, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+def highlight(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags"""
+    html = str(escape(snippet or ''))
+    return Markup(html.replace(MARK_START, '<mark>').replace(MARK_STOP, '</mark>'))
+
+def like_snippet(content, terms, width=120):
+    """Cut a window of `content` around the first term, for databases without full-text search"""
+    content = content or ''
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    match = pattern.search(content)
+    start = max(0, match.start() - width // 2) if match else 0
+    window = content[start:start + width]
+    window = pattern.sub(lambda m: MARK_START + m.group(0) + MARK_STOP, window)
+    return ('…' if start else '') + window + ('…' if start + width < len(content) else '')
+
+def search_debates(user_id, query, page=1, page_size=20):
+    """Return (hits, has_more) for one page of `user_id`'s debates matching `query`.
+
+    Hits are topic or turn matches, best first, each with a highlighted
+    snippet. A hit on the topic has no turn_index.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+
+    params = {
+        'user_id': user_id,
+        'limit': page_size + 1,
+        'offset': (max(page, 1) - 1) * page_size
+    }
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        # Quoted terms keep FTS5 operators in user input from being interpreted;
+        # the last one matches as a prefix so partial words still find results
+        params['query'] = ' '.join(f'"{term}"' for term in terms) + '*'
+        params.update(start=MARK_START, stop=MARK_STOP)
+        sql = SQLITE_QUERY
+    elif dialect == 'postgresql':
+        params['query'] = query
+        params['headline'] = f'StartSel={MARK_START}, StopSel={MARK_STOP}, MaxWords=30, MinWords=12'
+        sql = POSTGRES_QUERY
+    else:
+        params['pattern'] = f'%{terms[0].lower()}%'
+        sql = LIKE_QUERY
+
+    statement = text(sql).columns(
+        debate_id=db.Integer,
+        topic=db.String,
+        created_at=db.DateTime,
+        turn_index=db.Integer,
+        speaker=db.String
+    )
+    rows = db.session.execute(statement, params).mappings().all()
+    hits = []
+    for row in rows[:page_size]:
+        snippet = row['snippet'] if 'rank' in row else like_snippet(row['snippet'], terms)
+        hits.append({
+            'debate_id': row['debate_id'],
+            'topic': row['topic'],
+            'created_at': row['created_at'],
+            'turn_index': row['turn_index'],
+            'speaker': row['speaker'],
+            'snippet': highlight(snippet)
+        })
+    return hits, len(rows) > page_size
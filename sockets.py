@@ -0,0 +1,78 @@
+from flask_login import current_user
+from flask_socketio import join_room, leave_room
+from db_init import app, socketio
+from models import Debate, DebateTurn
+from ai_utils import audio_url
+from debate_sessions import debate_sessions
+from speculation import speculator
+
+def debate_room(debate_id):
+    return f'debate_{debate_id}'
+
+def owned_debate(data):
+    """Return the debate named in `data` if it belongs to the current user"""
+    if not current_user.is_authenticated or not isinstance(data, dict):
+        return None
+    try:
+        debate_id = int(data.get('debate_id'))
+    except (TypeError, ValueError):
+        return None
+    debate = Debate.query.get(debate_id)
+    if debate is None or debate.user_id != current_user.id:
+        return None
+    return debate
+
+@socketio.on('join_debate')
+def join_debate(data):
+    debate = owned_debate(data)
+    if debate is None:
+        return {'ok': False, 'error': 'Unauthorized'}
+    join_room(debate_room(debate.id))
+    # Tells the client whether to send interim speech transcripts, and the audio
+    # of the latest replies in case audio_ready was sent before it joined
+    return {
+        'ok': True,
+        'debate_id': debate.id,
+        'speculation': app.config['SPECULATION_ENABLED'],
+        'audio': recent_audio(debate.id)
+    }
+
+def recent_audio(debate_id, limit=2):
+    debate_sessions.flush_debate(debate_id)
+    turns = DebateTurn.query.filter(
+        DebateTurn.debate_id == debate_id,
+        DebateTurn.speaker == 'ai',
+        DebateTurn.audio_id.isnot(None)
+    ).order_by(DebateTurn.turn_index.desc()).limit(limit)
+    return [{
+        'audio_id': turn.audio_id,
+        'status': turn.audio_status,
+        'audio_url': audio_url(turn.audio)
+    } for turn in turns]
+
+@socketio.on('leave_debate')
+def leave_debate(data):
+    debate = owned_debate(data)
+    if debate is None:
+        return {'ok': False, 'error': 'Unauthorized'}
+    leave_room(debate_room(debate.id))
+    return {'ok': True, 'debate_id': debate.id}
+
+@socketio.on('interim_transcript')
+def interim_transcript(data):
+    """Draft a rebuttal from the stable part of the user's speech so far"""
+    if not app.config['SPECULATION_ENABLED']:
+        return {'ok': False, 'error': 'Speculation disabled'}
+    if not current_user.is_authenticated or not isinstance(data, dict):
+        return {'ok': False, 'error': 'Unauthorized'}
+    try:
+        debate_id = int(data.get('debate_id'))
+    except (TypeError, ValueError):
+        return {'ok': False, 'error': 'Unauthorized'}
+
+    # Sent every few seconds while speaking, so served from the session cache
+    session = debate_sessions.get(debate_id)
+    if session is None or session.user_id != current_user.id:
+        return {'ok': False, 'error': 'Unauthorized'}
+    drafting = speculator.offer(session, str(data.get('text', '')))
+    return {'ok': True, 'debate_id': debate_id, 'drafting': drafting}
@@ -0,0 +1,195 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from db_init import app
+from ai_utils import build_debate_prompt, request_llm, generate_tts, DEBATE_SETTINGS
+from prompt_builder import estimate_tokens
+from rate_limit import RateLimiter, RateLimited, pause
+from metrics import registry, record_cache
+
+logger = logging.getLogger(__name__)
+
+def normalize_words(text):
+    return re.findall(r"[a-z0-9']+", (text or '').lower())
+
+class Draft:
+    """A rebuttal being drafted against the user's speech so far"""
+
+    def __init__(self, basis, turn_count):
+        self.basis = basis
+        self.words = normalize_words(basis)
+        self.turn_count = turn_count
+        self.created = time.monotonic()
+        self.text = None
+        self.ready = threading.Event()
+
+class Speculator:
+    """Draft the AI rebuttal from interim speech transcripts before submit.
+
+    Each debate holds at most one draft, made against the stable part of
+    what the user has said so far. On submit the draft is reused if the
+    final argument matches the drafted text closely enough and no other
+    turn has been added since; otherwise it is discarded and the reply is
+    generated as usual. Drafts are throttled per debate (`min_interval`,
+    `min_words`), per user (`limiter`) and across the process
+    (`max_inflight`).
+    """
+
+    def __init__(self, draft, synthesize=None, limiter=None, min_words=8, min_interval=3.0, max_inflight=4,
+                 similarity=0.9, max_age=60, token_cost=None):
+        self.draft = draft
+        self.synthesize = synthesize
+        self.limiter = limiter
+        self.min_words = min_words
+        self.min_interval = min_interval
+        self.max_inflight = max_inflight
+        self.similarity = similarity
+        self.max_age = max_age
+        self.token_cost = token_cost or (lambda text: 0)
+        self.executor = ThreadPoolExecutor(max_workers=max(max_inflight, 1), thread_name_prefix='speculation')
+        self.drafts = {}
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.drafted = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.skipped = 0
+
+    def offer(self, session, text):
+        """Consider drafting a reply to `text`, returning True if a draft was started"""
+        words = normalize_words(text)
+        if len(words) < self.min_words:
+            return False
+
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+            current = self.drafts.get(session.id)
+            if current is not None and current.turn_count == session.turn_count:
+                # Keep the draft while the speech still matches it
+                if self._matches(current.words, words):
+                    return False
+                if now - current.created < self.min_interval:
+                    self.skipped += 1
+                    return False
+            if self.inflight >= self.max_inflight:
+                self.skipped += 1
+                return False
+
+        if self.limiter is not None:
+            try:
+                self.limiter.admit(f'user:{session.user_id}', self.token_cost(text))
+            except RateLimited:
+                with self.lock:
+                    self.skipped += 1
+                return False
+
+        history = session.history(last=app.config['PROMPT_MAX_TURNS'])
+        history.append({'speaker': 'user', 'text': text})
+        prompt = (session.topic, session.ai_position, history, session.summary)
+        draft = Draft(text, session.turn_count)
+        with self.lock:
+            if self.drafts.get(session.id) is not None:
+                self.discarded += 1
+            self.drafts[session.id] = draft
+            self.inflight += 1
+            self.drafted += 1
+        self.executor.submit(self._run, draft, prompt)
+        return True
+
+    def claim(self, debate_id, text, turn_count, timeout=30):
+        """Return the drafted reply if it still fits `text`, else None"""
+        with self.lock:
+            draft = self.drafts.pop(debate_id, None)
+        if draft is None:
+            return None
+
+        hit = (
+            draft.turn_count == turn_count
+            and time.monotonic() - draft.created <= self.max_age
+            and self._matches(draft.words, normalize_words(text))
+        )
+        if hit:
+            # A draft still being written is usually closer to done than a fresh call
+            deadline = time.monotonic() + timeout
+            while not draft.ready.is_set() and time.monotonic() < deadline:
+                pause(0.02)
+            hit = draft.text is not None
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache('speculation', hit)
+        return draft.text if hit else None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'drafts': len(self.drafts),
+                'inflight': self.inflight,
+                'drafted': self.drafted,
+                'hits': self.hits,
+                'misses': self.misses,
+                'discarded': self.discarded,
+                'skipped': self.skipped,
+                'hit_rate': round(self.hits / self.drafted, 3) if self.drafted else None
+            }
+
+    def _matches(self, drafted, final):
+        return SequenceMatcher(None, drafted, final, autojunk=False).ratio() >= self.similarity
+
+    def _expire(self, now):
+        for debate_id, draft in list(self.drafts.items()):
+            if now - draft.created > self.max_age:
+                del self.drafts[debate_id]
+                self.discarded += 1
+
+    def _run(self, draft, prompt):
+        try:
+            draft.text = self.draft(*prompt)
+        except Exception as e:
+            logger.info("Speculative draft failed: %s", e)
+        finally:
+            draft.ready.set()
+
+        try:
+            # Audio goes into the TTS cache, so the real job for this reply is a cache hit
+            if draft.text and self.synthesize is not None:
+                self.synthesize(draft.text)
+        except Exception as e:
+            logger.info("Speculative TTS failed: %s", e)
+        finally:
+            with self.lock:
+                self.inflight -= 1
+
+def draft_rebuttal(topic, position, history, summary=None):
+    """Like generate_debate_response, but raises instead of returning a fallback message"""
+    prompt = build_debate_prompt(topic, position, history, summary)
+    return request_llm('debate', prompt, DEBATE_SETTINGS)
+
+def prefetch_tts(text):
+    generate_tts(text, timeout=app.config['TTS_JOB_TIMEOUT'])
+
+speculator = Speculator(
+    draft=draft_rebuttal,
+    synthesize=prefetch_tts if app.config['SPECULATION_PREFETCH_TTS'] else None,
+    limiter=RateLimiter(
+        window=60,
+        max_requests=app.config['SPECULATION_RATE_LIMIT'],
+        max_tokens=app.config['SPECULATION_TOKEN_LIMIT'],
+        queue_size=0
+    ),
+    min_words=app.config['SPECULATION_MIN_WORDS'],
+    min_interval=app.config['SPECULATION_MIN_INTERVAL'],
+    max_inflight=app.config['SPECULATION_MAX_INFLIGHT'],
+    similarity=app.config['SPECULATION_SIMILARITY'],
+    max_age=app.config['SPECULATION_MAX_AGE'],
+    token_cost=lambda text: app.config['PROMPT_TOKEN_BUDGET'] + estimate_tokens(text)
+)
+
+registry.gauge('speculation_inflight', 'Speculative rebuttal drafts being generated.', lambda: speculator.inflight)
@@ -1,6 +1,3 @@
-// Initialize SocketIO connection
-const socket = io();
-
 // Voice recognition setup
 function initVoiceRecognition() {
     if (!('webkitSpeechRecognition' in window)) {
@@ -18,22 +15,55 @@ function initVoiceRecognition() {
 
 // Initialize when document is ready
 $(document).ready(function() {
+    // The debate page opens its own connection and wires its handlers inline
+    if (typeof debateId !== 'undefined' || !$('#chat-container').length) return;
+    
+    // Initialize SocketIO connection
+    const socket = io();
     const recognition = initVoiceRecognition();
     let currentDebateId = null;
+    let streamingTextDiv = null;
+    let speculate = false;
+    let stableTranscript = '';
+    
+    // The ack says whether the server drafts replies from interim speech
+    function joinDebate() {
+        socket.emit('join_debate', {debate_id: currentDebateId}, function(ack) {
+            speculate = Boolean(ack && ack.speculation);
+        });
+    }
+    
+    // Rooms are per connection, so rejoin after a reconnect
+    socket.on('connect', function() {
+        if (currentDebateId) {
+            joinDebate();
+        }
+    });
+    
+    // Streamed AI response chunks, appended as they arrive
+    socket.on('ai_response_chunk', function(data) {
+        if (data.debate_id !== currentDebateId) return;
+        
+        if (!streamingTextDiv) {
+            streamingTextDiv = createAiMessage();
+        }
+        streamingTextDiv.text(streamingTextDiv.text() + data.text);
+        $('#chat-container').scrollTop($('#chat-container')[0].scrollHeight);
+    });
     
     // Real-time AI response handling
     socket.on('ai_response', function(data) {
         if (data.debate_id !== currentDebateId) return;
         
-        const messageDiv = $('<div>').addClass('flex justify-start mb-2');
-        const contentDiv = $('<div>').addClass('bg-gray-100 p-3 rounded-lg max-w-lg');
-        const header = $('<div>').addClass('font-bold text-indigo-600').html('<i class="fas fa-robot mr-2"></i>AI');
-        contentDiv.append(header);
+        // The text was already streamed in, so only settle it and play audio
+        if (streamingTextDiv) {
+            streamingTextDiv.text(data.text);
+            streamingTextDiv = null;
+            playAudio(data.audio_url);
+            return;
+        }
         
-        const textDiv = $('<div>').attr('id', 'typing-text').text('');
-        contentDiv.append(textDiv);
-        messageDiv.append(contentDiv);
-        $('#chat-container').append(messageDiv);
+        const textDiv = createAiMessage();
         
         // Typewriter effect for AI response
         let i = 0;
@@ -46,13 +76,67 @@ $(document).ready(function() {
                 $('#chat-container').scrollTop($('#chat-container')[0].scrollHeight);
             } else {
                 // Play audio when done typing
-                const audio = new Audio(data.audio_url);
-                audio.play();
+                playAudio(data.audio_url);
             }
         }
         typeWriter();
     });
     
+    // Audio is synthesized in the background and arrives after the text
+    socket.on('audio_ready', function(data) {
+        if (data.debate_id !== currentDebateId) return;
+        // Segmented replies have already been played sentence by sentence
+        if (data.segmented) return;
+        playAudio(data.audio_url);
+    });
+    
+    // Pipelined replies arrive one sentence at a time and play back to back
+    const segmentQueue = [];
+    let segmentPlaying = false;
+    
+    socket.on('audio_segment', function(data) {
+        if (data.debate_id !== currentDebateId || !data.audio_url) return;
+        
+        // Create the element now so the browser starts buffering it early
+        const audio = new Audio(data.audio_url);
+        audio.preload = 'auto';
+        segmentQueue.push(audio);
+        if (!segmentPlaying) {
+            playNextSegment();
+        }
+    });
+    
+    function playNextSegment() {
+        const audio = segmentQueue.shift();
+        if (!audio) {
+            segmentPlaying = false;
+            return;
+        }
+        segmentPlaying = true;
+        audio.onended = playNextSegment;
+        audio.onerror = playNextSegment;
+        audio.play();
+    }
+    
+    function playAudio(url) {
+        if (!url) return;
+        const audio = new Audio(url);
+        audio.play();
+    }
+    
+    function createAiMessage() {
+        const messageDiv = $('<div>').addClass('flex justify-start mb-2');
+        const contentDiv = $('<div>').addClass('bg-gray-100 p-3 rounded-lg max-w-lg');
+        const header = $('<div>').addClass('font-bold text-indigo-600').html('<i class="fas fa-robot mr-2"></i>AI');
+        contentDiv.append(header);
+        
+        const textDiv = $('<div>').attr('id', 'typing-text').text('');
+        contentDiv.append(textDiv);
+        messageDiv.append(contentDiv);
+        $('#chat-container').append(messageDiv);
+        return textDiv;
+    }
+    
     // Start debate
     $('#start-debate').click(function() {
         const topic = $('#topic').val();
@@ -66,7 +150,7 @@ $(document).ready(function() {
         }, function(response) {
             currentDebateId = response.debate_id;
             // Join debate room
-            socket.emit('join_debate', {debate_id: currentDebateId});
+            joinDebate();
             
             $('#setup-section').addClass('hidden');
             $('#debate-interface').removeClass('hidden');
@@ -101,6 +185,20 @@ $(document).ready(function() {
                 }
             }
             $('#user-input').val(transcript);
+            
+            // Send the finalized part of the speech so far for a draft rebuttal
+            if (speculate && currentDebateId) {
+                let stable = '';
+                for (let i = 0; i < event.results.length; ++i) {
+                    if (event.results[i].isFinal) {
+                        stable += event.results[i][0].transcript;
+                    }
+                }
+                if (stable !== stableTranscript) {
+                    stableTranscript = stable;
+                    socket.emit('interim_transcript', {debate_id: currentDebateId, text: stable});
+                }
+            }
         };
     }
     
@@ -111,6 +209,7 @@ $(document).ready(function() {
         
         addMessageToChat('user', argument);
         $('#user-input').val('');
+        stableTranscript = '';
         
         $.post('/debate/submit', {
             debate_id: currentDebateId,
@@ -133,25 +232,25 @@ $(document).ready(function() {
             );
         });
     });
-});
-
-function addMessageToChat(speaker, text) {
-    const isUser = speaker === 'user';
-    const messageClass = isUser ? 'bg-indigo-100 border-indigo-300' : 'bg-gray-100 border-gray-300';
-    const name = isUser ? 'You' : 'AI';
-    const icon = isUser ? 'fas fa-user' : 'fas fa-robot';
-    
-    $('#chat-container').append(`
-        <div class="flex ${isUser ? 'justify-end' : 'justify-start'} mb-2">
-            <div class="max-w-lg p-3 rounded-lg ${messageClass}">
-                <div class="font-semibold ${isUser ? 'text-indigo-700' : 'text-gray-700'}">
-                    <i class="${icon} mr-2"></i>${name}
+    
+    function addMessageToChat(speaker, text) {
+        const isUser = speaker === 'user';
+        const messageClass = isUser ? 'bg-indigo-100 border-indigo-300' : 'bg-gray-100 border-gray-300';
+        const name = isUser ? 'You' : 'AI';
+        const icon = isUser ? 'fas fa-user' : 'fas fa-robot';
+    
+        $('#chat-container').append(`
+            <div class="flex ${isUser ? 'justify-end' : 'justify-start'} mb-2">
+                <div class="max-w-lg p-3 rounded-lg ${messageClass}">
+                    <div class="font-semibold ${isUser ? 'text-indigo-700' : 'text-gray-700'}">
+                        <i class="${icon} mr-2"></i>${name}
+                    </div>
+                    <div>${text}</div>
                 </div>
-                <div>${text}</div>
             </div>
-        </div>
-    `);
+        `);
     
-    // Scroll to bottom
-    $('#chat-container').scrollTop($('#chat-container')[0].scrollHeight);
-}
\ No newline at end of file
+        // Scroll to bottom
+        $('#chat-container').scrollTop($('#chat-container')[0].scrollHeight);
+    }
+});
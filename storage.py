@@ -0,0 +1,57 @@
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+
+def engine_options(uri, pool_size=10, max_overflow=20, pool_timeout=30, pool_recycle=1800, busy_timeout=30):
+    """SQLAlchemy engine options suited to the database behind `uri`"""
+    if make_url(uri).get_backend_name() == 'sqlite':
+        # Connections are shared across threads and gevent greenlets; wait on
+        # locks rather than failing immediately with "database is locked"
+        return {
+            'connect_args': {'timeout': busy_timeout, 'check_same_thread': False},
+            'pool_pre_ping': True
+        }
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': True
+    }
+
+def sqlite_pragmas(busy_timeout=30):
+    return (
+        # Readers no longer block the writer, nor the writer readers
+        'PRAGMA journal_mode=WAL',
+        # Safe with WAL and avoids an fsync on every commit
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={int(busy_timeout * 1000)}',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA cache_size=-16000'
+    )
+
+def init_storage(app, db):
+    """Apply per-connection pragmas when the app runs on SQLite"""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(app.config['SQLITE_BUSY_TIMEOUT'])
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def end_transaction(db):
+    """Commit the session so no transaction or pooled connection is held
+    while waiting on slow external calls such as the LLM or TTS"""
+    db.session.commit()
+
+def is_transient(error):
+    """True for database errors worth retrying: locks, timeouts and dropped connections"""
+    if isinstance(error, exc.DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (exc.OperationalError, exc.DisconnectionError, exc.TimeoutError))
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from db_init import app, db
+from models import Debate
+from ai_utils import summarize_turns
+from storage import end_transaction
+from debate_sessions import debate_sessions
+
+# A single worker keeps summary updates for the same debate in order
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='debate-summarizer')
+pending = set()
+pending_lock = threading.Lock()
+
+def maybe_schedule_summary(debate):
+    """Queue a summary update once enough turns have aged out of the recent window"""
+    end = debate.turn_count - app.config['SUMMARY_KEEP_RECENT']
+    if end - (debate.summary_turn_count or 0) < app.config['SUMMARY_BATCH_TURNS']:
+        return
+    
+    with pending_lock:
+        if debate.id in pending:
+            return
+        pending.add(debate.id)
+    executor.submit(update_summary, debate.id)
+
+def update_summary(debate_id):
+    try:
+        debate_sessions.flush_debate(debate_id)
+        with app.app_context():
+            debate = Debate.query.get(debate_id)
+            start = debate.summary_turn_count or 0
+            end = debate.turn_count - app.config['SUMMARY_KEEP_RECENT']
+            if end <= start:
+                return
+            
+            turns = debate.get_transcript(since=start)[:end - start]
+            args = (debate.topic, debate.summary, turns)
+            end_transaction(db)
+            
+            summary = summarize_turns(*args)
+            if summary is None:
+                return
+            
+            debate.summary = summary
+            debate.summary_turn_count = end
+            db.session.commit()
+            debate_sessions.set_fields(debate_id, summary=summary, summary_turn_count=end)
+    finally:
+        with pending_lock:
+            pending.discard(debate_id)
@@ -0,0 +1,128 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Final cache files; writers use ".tmp_" names until the content is complete
+CACHE_NAME = re.compile(r'tts_[0-9a-f]{64}\.[a-z0-9]+')
+
+def is_cache_name(name):
+    return CACHE_NAME.fullmatch(name) is not None
+
+class TTSCache:
+    """Content-addressed store for synthesized audio under static/audio.
+
+    Files are named after a hash of the text and voice settings, so
+    identical phrases map to the same file. The total size is kept under
+    `max_bytes` by evicting the least recently used files first; a cache
+    hit refreshes the file's modification time. The directory is scanned
+    once `sweep_bytes` have been written since the last sweep, or on the
+    first write after `sweep_interval` seconds, rather than on every
+    write. Evicted paths are passed to `on_evict`.
+    """
+
+    def __init__(self, directory='static/audio', max_bytes=500 * 1024 * 1024, sweep_bytes=None,
+                 sweep_interval=300, on_evict=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.sweep_bytes = sweep_bytes if sweep_bytes is not None else max_bytes // 20
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+        self.lock = threading.Lock()
+        self.unswept_bytes = 0
+        self.last_sweep = time.monotonic()
+
+    def key(self, text, rate, volume, voice=None, variant=None):
+        payload = f"{rate}|{volume}|{voice or ''}|{text}"
+        if variant:
+            # Distinguishes encoded outputs such as "mp3:48k" from the source WAV
+            payload = f"{variant}|{payload}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key, extension='wav'):
+        return f"{self.directory}/tts_{key}.{extension}"
+
+    def lookup(self, path):
+        """Return True if a non-empty cached file exists, marking it as recently used"""
+        try:
+            if os.path.getsize(path) == 0:
+                return False
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def record_write(self, path):
+        """Account for a newly written file, enforcing the quota when a sweep is due"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self.lock:
+            self.unswept_bytes += size
+            due = (self.unswept_bytes >= self.sweep_bytes
+                   or time.monotonic() - self.last_sweep >= self.sweep_interval)
+        if due:
+            self.enforce_quota()
+
+    def enforce_quota(self):
+        """Evict least recently used files until the directory fits the quota"""
+        with self.lock:
+            self.unswept_bytes = 0
+            self.last_sweep = time.monotonic()
+            files = self._entries()
+            total = sum(size for _, size, _ in files)
+            evicted = []
+            for path, size, _ in sorted(files, key=lambda entry: entry[2]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    evicted.append(path)
+                except OSError:
+                    pass
+        if evicted and self.on_evict is not None:
+            try:
+                self.on_evict(evicted)
+            except Exception:
+                logger.exception("Failed to record %d evicted audio files", len(evicted))
+        return len(evicted)
+
+    def sweep_orphans(self, referenced, grace_seconds=3600):
+        """Remove files no transcript references, skipping recently written ones"""
+        referenced = {os.path.normpath(path) for path in referenced if path}
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        with self.lock:
+            for path, _, mtime in self._entries():
+                if mtime > cutoff or os.path.normpath(path) in referenced:
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def usage(self):
+        files = self._entries()
+        return {
+            'files': len(files),
+            'bytes': sum(size for _, size, _ in files),
+            'max_bytes': self.max_bytes
+        }
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.startswith('tts_'):
+                stat = entry.stat()
+                entries.append((f"{self.directory}/{entry.name}", stat.st_size, stat.st_mtime))
+        return entries
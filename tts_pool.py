@@ -0,0 +1,173 @@
+import os
+import queue
+import threading
+import multiprocessing
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TTSPoolBusy(Exception):
+    """Raised when the pool cannot admit another synthesis job"""
+
+def _worker_main(conn, rate, volume, voice):
+    """Own a pyttsx3 engine and synthesize jobs received over `conn`"""
+    import pyttsx3
+    engine = pyttsx3.init()
+    engine.setProperty('rate', rate)
+    engine.setProperty('volume', volume)
+    if voice:
+        engine.setProperty('voice', voice)
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        text, temp_filename, filename = job
+        try:
+            engine.save_to_file(text, temp_filename)
+            engine.runAndWait()
+            os.replace(temp_filename, filename)
+            conn.send((True, None))
+        except Exception as e:
+            conn.send((False, str(e)))
+
+class _Worker:
+    def __init__(self, context, rate, volume, voice):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, rate, volume, voice),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+class TTSPool:
+    """Pool of worker processes, each owning its own pyttsx3 engine.
+
+    At most `size` jobs synthesize at once and at most `max_pending` more
+    may wait for a free worker; anything beyond that is refused with
+    TTSPoolBusy. A worker that does not finish a job within the timeout
+    is killed and replaced.
+    """
+
+    def __init__(self, size=2, max_pending=16, rate=180, volume=0.9, voice=None):
+        self.size = size
+        self.max_pending = max_pending
+        self.rate = rate
+        self.volume = volume
+        self.voice = voice
+        self.context = multiprocessing.get_context('spawn')
+        self.admission = threading.BoundedSemaphore(size + max_pending)
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.started = False
+        self.active = 0
+        self.waiting = 0
+        self.restarts = 0
+        self.rejected = 0
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            for _ in range(self.size):
+                self.idle.put(self._spawn())
+            self.started = True
+
+    def shutdown(self):
+        with self.lock:
+            if not self.started:
+                return
+            self.started = False
+        while True:
+            try:
+                self.idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+    def synthesize(self, text, temp_filename, filename, timeout=10):
+        """Synthesize `text` into `filename`, returning True on success"""
+        self.start()
+        if not self.admission.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise TTSPoolBusy('TTS pool is at capacity')
+
+        try:
+            with self.lock:
+                self.waiting += 1
+            try:
+                worker = self.idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TTSPoolBusy('Timed out waiting for a TTS worker')
+            finally:
+                with self.lock:
+                    self.waiting -= 1
+
+            with self.lock:
+                self.active += 1
+            try:
+                return self._run(worker, text, temp_filename, filename, timeout)
+            finally:
+                with self.lock:
+                    self.active -= 1
+        finally:
+            self.admission.release()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': self.size,
+                'active': self.active,
+                'waiting': self.waiting,
+                'max_pending': self.max_pending,
+                'restarts': self.restarts,
+                'rejected': self.rejected
+            }
+
+    def _run(self, worker, text, temp_filename, filename, timeout):
+        try:
+            worker.conn.send((text, temp_filename, filename))
+            if not worker.conn.poll(timeout):
+                logger.warning("TTS worker %s hung, restarting it", worker.process.pid)
+                self._replace(worker)
+                return False
+            ok, error = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            logger.warning("TTS worker %s died: %s", worker.process.pid, e)
+            self._replace(worker)
+            return False
+
+        if not ok:
+            logger.error("TTS Error: %s", error)
+        self.idle.put(worker)
+        return ok
+
+    def _replace(self, worker):
+        worker.kill()
+        with self.lock:
+            self.restarts += 1
+        self.idle.put(self._spawn())
+
+    def _spawn(self):
+        return _Worker(self.context, self.rate, self.volume, self.voice)
@@ -0,0 +1,167 @@
+import os
+import logging
+import queue
+import threading
+from db_init import app, emit_threadsafe
+from debate_sessions import debate_sessions
+from ai_utils import (generate_tts, combine_tts, split_sentences, tts_ready, cached_tts,
+                      encoded_tts_path, encode_tts, audio_url)
+from metrics import registry, span, FAILURES
+
+logger = logging.getLogger(__name__)
+
+class TTSQueue:
+    """Bounded queue of TTS jobs processed by background worker threads.
+
+    Each job synthesizes the audio for one transcript entry, patches the
+    entry with the finished file and emits an `audio_ready` event to the
+    debate room. Workers are native threads, since synthesis blocks, so
+    their events are handed to the gevent hub through emit_threadsafe().
+    """
+
+    def __init__(self, max_depth=32, workers=1, job_timeout=10):
+        self.jobs = queue.Queue(maxsize=max_depth)
+        self.max_depth = max_depth
+        self.worker_count = workers
+        self.job_timeout = job_timeout
+        self.lock = threading.Lock()
+        self.workers = []
+        self.in_progress = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        with self.lock:
+            if self.workers:
+                return
+            for i in range(self.worker_count):
+                worker = threading.Thread(target=self._run, name=f'tts-worker-{i}', daemon=True)
+                worker.start()
+                self.workers.append(worker)
+
+    def submit(self, audio_id, debate_id, text, pipelined=False):
+        """Queue a TTS job, returning False if the queue is full.
+
+        Pipelined jobs synthesize one sentence at a time and emit an
+        `audio_segment` event per sentence before the combined file is ready.
+        """
+        self.start()
+        try:
+            self.jobs.put_nowait((audio_id, debate_id, text, pipelined))
+        except queue.Full:
+            with self.lock:
+                self.rejected += 1
+            logger.warning("TTS queue full, skipping audio for debate %s", debate_id)
+            return False
+        return True
+
+    def stats(self):
+        with self.lock:
+            return {
+                'queued': self.jobs.qsize(),
+                'max_depth': self.max_depth,
+                'workers': self.worker_count,
+                'in_progress': self.in_progress,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+
+    def _run(self):
+        while True:
+            audio_id, debate_id, text, pipelined = self.jobs.get()
+            with self.lock:
+                self.in_progress += 1
+            try:
+                with span('tts'):
+                    sentences = split_sentences(text) if pipelined else []
+                    if len(sentences) > 1:
+                        self._process_pipelined(audio_id, debate_id, text, sentences)
+                    else:
+                        self._process(audio_id, debate_id, text)
+            except Exception as e:
+                logger.exception("TTS job %s failed: %s", audio_id, e)
+                self._finish(audio_id, debate_id, None)
+            finally:
+                with self.lock:
+                    self.in_progress -= 1
+                self.jobs.task_done()
+
+    def _process(self, audio_id, debate_id, text):
+        filename = generate_tts(text, timeout=self.job_timeout)
+        if not tts_ready(filename):
+            logger.warning("TTS job %s timed out or produced no audio", audio_id)
+            filename = None
+        self._finish(audio_id, debate_id, filename)
+
+    def _process_pipelined(self, audio_id, debate_id, text, sentences):
+        cached = cached_tts(text)
+        if cached:
+            self._finish(audio_id, debate_id, cached)
+            return
+
+        # Segments stay as WAV until the full reply has been joined
+        segment_files = []
+        for index, sentence in enumerate(sentences):
+            filename = generate_tts(sentence, timeout=self.job_timeout, encode=False)
+            if not tts_ready(filename):
+                logger.warning("TTS job %s segment %s timed out or produced no audio", audio_id, index)
+                self._finish(audio_id, debate_id, None, segmented=bool(segment_files))
+                return
+            segment_files.append(filename)
+
+            encoded_filename = encoded_tts_path(sentence)
+            if encoded_filename:
+                filename = encode_tts(filename, encoded_filename, keep_wav=True)
+            emit_threadsafe('audio_segment', {
+                'debate_id': debate_id,
+                'audio_id': audio_id,
+                'index': index,
+                'count': len(sentences),
+                'audio_url': audio_url(filename)
+            }, room=f'debate_{debate_id}')
+
+        # The transcript keeps one file for the whole reply, for replay from history
+        filename = combine_tts(text, segment_files)
+        encoded_filename = encoded_tts_path(text)
+        if filename and encoded_filename:
+            filename = encode_tts(filename, encoded_filename)
+            if not app.config['TTS_KEEP_WAV']:
+                for segment_file in segment_files:
+                    if os.path.exists(segment_file):
+                        os.remove(segment_file)
+        self._finish(audio_id, debate_id, filename, segmented=True)
+
+    def _finish(self, audio_id, debate_id, filename, segmented=False):
+        with self.lock:
+            if filename:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if not filename:
+            FAILURES.inc(component='tts')
+
+        # The turn may not have been written yet; the session cache handles both cases
+        debate_sessions.update_turn(debate_id, {'audio_id': audio_id}, {
+            'audio': filename,
+            'audio_status': 'ready' if filename else 'failed'
+        })
+
+        with span('socket_emit'):
+            emit_threadsafe('audio_ready', {
+                'debate_id': debate_id,
+                'audio_id': audio_id,
+                'audio_url': audio_url(filename),
+                'status': 'ready' if filename else 'failed',
+                'segmented': segmented
+            }, room=f'debate_{debate_id}')
+
+tts_queue = TTSQueue(
+    max_depth=app.config['TTS_QUEUE_MAX_DEPTH'],
+    workers=app.config['TTS_QUEUE_WORKERS'],
+    job_timeout=app.config['TTS_JOB_TIMEOUT']
+)
+
+registry.gauge('tts_queue_depth', 'TTS jobs waiting in the queue.', lambda: tts_queue.jobs.qsize())
+registry.gauge('tts_queue_in_progress', 'TTS jobs being processed.', lambda: tts_queue.in_progress)
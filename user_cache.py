@@ -0,0 +1,42 @@
+from flask_login import UserMixin
+from sqlalchemy import event
+from db_init import app
+from models import User
+from ttl_cache import TTLCache
+from metrics import record_cache
+
+class CachedUser(UserMixin):
+    """Detached snapshot of a User row, safe to share between requests"""
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.google_id = user.google_id
+
+# Users loaded by Flask-Login on every authenticated request
+user_cache = TTLCache(
+    max_size=app.config['USER_CACHE_SIZE'],
+    ttl=app.config['USER_CACHE_TTL']
+)
+
+def load_cached_user(user_id):
+    user_id = int(user_id)
+    user = user_cache.get(user_id)
+    record_cache('user', user is not None)
+    if user is None:
+        row = User.query.get(user_id)
+        if row is None:
+            return None
+        user = CachedUser(row)
+        user_cache.set(user_id, user)
+    return user
+
+def invalidate_user(user_id):
+    user_cache.pop(user_id)
+
+# Changes made in other processes are picked up once the TTL expires
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def user_changed(mapper, connection, target):
+    invalidate_user(target.id)